@@ -1,21 +1,28 @@
 import streamlit as st
 import logging
-from utils.llm_client import LLMClient
-from utils.sotr_construction import SOTRMarkdown
-from utils.markdown_utils_experimental import PDFMarkdown
-from utils.compliance_check import ComplianceChecker
-import os
-import tempfile
+from utils.llm_client import make_llm_client
+from utils.tender_qa import TenderQA
+from utils.qa_cache import AnswerCache, DIGEST_ENABLED, build_digest
+from utils.document_store import DocumentStore, file_hash
+from utils.model_warmup import start_model_warmup, get_warmup_status
+from utils.single_flight import conversion_flights
+from utils.excel_io import cached_workbook
+from utils.cancellation import JobCancelled, jobs
+from utils.profiling import PROFILE_ENABLED, profile_run
+from contextlib import contextmanager
 import io
-import pandas as pd
-import gc
+import os
 from dotenv import load_dotenv
 load_dotenv()
 import traceback
 
+# Load tests (python -m utils.load_test) pick files from here instead of uploading them
+FIXTURE_DIR = os.getenv("TENDER_FIXTURE_DIR")
+
 @st.cache_data
 def load_env_vars():
-    required_vars = ["ANTHROPIC_MODEL", "ANTHROPIC_API_KEY"]
+    # The stubbed LLM backend needs no credentials
+    required_vars = [] if os.getenv("LLM_BACKEND") == "stub" else ["ANTHROPIC_MODEL", "ANTHROPIC_API_KEY"]
     env_vars = {}
     missing_vars = []
 
@@ -35,7 +42,106 @@ def load_env_vars():
 
 @st.cache_resource
 def get_llm_client(env_vars):
-    return LLMClient(anthropic_model=env_vars.get('anthropic_model'))
+    return make_llm_client(anthropic_model=env_vars.get('anthropic_model'))
+
+@st.cache_resource
+def get_document_store():
+    return DocumentStore()
+
+class FixtureFile(io.BytesIO):
+    """Stands in for a Streamlit UploadedFile, read from FIXTURE_DIR."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            super().__init__(f.read())
+        self.path = path
+        self.name = os.path.basename(path)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, FixtureFile) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+def file_input(label: str, type, key: str, accept_multiple_files: bool = False):
+    """
+    st.file_uploader, or with TENDER_FIXTURE_DIR set a picker over the fixture
+    files of that type: the app-testing API used by load tests cannot upload files.
+    """
+    if not FIXTURE_DIR:
+        return st.file_uploader(label, type=type, key=key, accept_multiple_files=accept_multiple_files)
+    names = sorted(name for name in os.listdir(FIXTURE_DIR) if name.rpartition(".")[2].lower() in type)
+    if accept_multiple_files:
+        return [FixtureFile(os.path.join(FIXTURE_DIR, name)) for name in st.multiselect(label, names, key=key)]
+    name = st.selectbox(label, names, index=None, key=key)
+    return FixtureFile(os.path.join(FIXTURE_DIR, name)) if name else None
+
+def session_job(tab_name: str):
+    """
+    jobs.job keyed on this browser session and tab. Its token is cancelled when the
+    script run ends (rerun or stop), when a new job starts on the same tab, or once
+    the session's browser tab is closed, so worker threads do not outlive the UI.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if ctx is not None else "local"
+
+    def is_alive():
+        return not Runtime.exists() or Runtime.instance().is_active_session(session_id)
+
+    return jobs.job(f"{session_id}:{tab_name}", is_alive=is_alive)
+
+@contextmanager
+def profiled_run(name: str):
+    """profile_run around one tab's job when profiling is switched on in the sidebar (or with TENDER_PROFILE=1)."""
+    with profile_run(name, enabled=st.session_state.get("profile_runs", PROFILE_ENABLED)) as profiler:
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                st.session_state.profile_report = profiler
+
+def profile_report_sidebar() -> None:
+    profiler = st.session_state.get("profile_report")
+    if profiler is None or profiler.report_text is None:
+        return
+    with st.sidebar:
+        st.caption(f"Last profile: {profiler.name}, {profiler.seconds:.1f}s")
+        st.download_button(
+            label="📥 Download Profile Report",
+            data=profiler.report_text,
+            file_name=os.path.basename(profiler.report_path or f"{profiler.name}.txt"),
+            mime="text/plain"
+        )
+
+def model_status_sidebar() -> None:
+    status = get_warmup_status()
+    labels = {
+        "cold": "Models not loaded",
+        "importing": "Loading conversion libraries...",
+        "loading": "Loading conversion models...",
+        "warming": "Warming up conversion models...",
+        "ready": "Conversion models ready",
+        "failed": "Model warm-up failed",
+    }
+    with st.sidebar:
+        if status["state"] == "ready":
+            st.success(labels["ready"])
+            st.caption(f"Loaded in {status['load_seconds']}s, warm-up {status['warmup_seconds']}s")
+        elif status["state"] == "failed":
+            st.warning(f"{labels['failed']}: {status['error']}")
+        else:
+            st.info(labels[status["state"]])
+
+        flights = conversion_flights.metrics()
+        if flights["shared"]:
+            st.caption(f"Shared conversions: {flights['shared']} of {flights['runs'] + flights['shared']} requests "
+                       f"({flights['contention']:.0%}), {flights['wait_seconds']:.0f}s waited")
+
+        st.toggle("Profile pipeline runs", value=PROFILE_ENABLED, key="profile_runs",
+                  help="Capture cProfile and tracemalloc data for the next runs; the report can be downloaded below.")
 
 def sotr_processing_tab(llm_client) -> None:
     if 'sotr_processed' not in st.session_state:
@@ -43,12 +149,25 @@ def sotr_processing_tab(llm_client) -> None:
         st.session_state.processed_df = None
         st.session_state.last_uploaded_file = None
 
-    sotr_file = st.file_uploader("Upload SOTR Document", type=["pdf"])
+    sotr_file = file_input("Upload SOTR Document", type=["pdf"], key="sotr_pdf_uploader")
 
     if sotr_file is not None and sotr_file != st.session_state.last_uploaded_file:
         st.session_state.sotr_processed = False
         st.session_state.last_uploaded_file = sotr_file
 
+    store = get_document_store()
+
+    # Set by the Re-extract button: extract again even though a matrix is stored
+    reextract = st.session_state.get("sotr_reextract", False)
+
+    if sotr_file is not None and not st.session_state.sotr_processed and not reextract:
+        from utils.sotr_construction import SOTRMarkdown
+        stored_df = store.get_sotr_matrix(file_hash(sotr_file.getvalue()), SOTRMarkdown(llm_client=llm_client).result_version())
+        if stored_df is not None:
+            st.session_state.processed_df = stored_df
+            st.session_state.sotr_processed = True
+            st.info("Loaded the previously extracted matrix for this document.")
+
     if sotr_file is not None and not st.session_state.sotr_processed:
         try:
             progress_text = "Processing SOTR document. Please wait."
@@ -56,6 +175,8 @@ def sotr_processing_tab(llm_client) -> None:
 
             file_content = sotr_file.read()
             file_id = f"sotr_{sotr_file.name}"
+            sotr_hash = file_hash(file_content)
+            from utils.sotr_construction import SOTRMarkdown
             sotr = SOTRMarkdown(llm_client=llm_client)
 
             time_taken_to_convert_PDF_to_markdown_per_page_in_minutes = 0.5
@@ -65,27 +186,71 @@ def sotr_processing_tab(llm_client) -> None:
             with st.spinner(f"This might take upto {ETA_time_in_minutes:.2f} minutes"):        
                 my_bar.progress(15, text=progress_text)
 
-                sotr.load_from_pdf(file_content, file_id)
-                
-                my_bar.progress(50, text=progress_text)
-                
-                try:
-                    df, split_text = sotr.get_matrix_points()
-                    if df.empty:
-                        st.warning("No data was extracted from the document. Please check the content and try again.")
+                live_table = st.empty()
+
+                def show_rows(done, total, matrix_rows):
+                    live_table.dataframe(matrix_rows.to_frame(), use_container_width=True, hide_index=True)
+
+                def extract():
+                    stored_df = None if reextract else store.get_sotr_matrix(sotr_hash, sotr.result_version())
+                    if stored_df is not None:
+                        return stored_df
+
+                    markdown_text = store.get_markdown(sotr_hash)
+                    if markdown_text is None:
+                        def update_progress(window, sections_queued):
+                            done, total = window
+                            my_bar.progress(15 + int(60 * done / total), text=f"Converted pages {done}/{total} windows, {sections_queued} sections sent for extraction")
+
+                        df, split_text = sotr.stream_matrix_points_from_pdf(file_content, file_id, progress_callback=update_progress, rows_callback=show_rows)
+                        store.save_markdown(sotr_hash, sotr.markdown_text, sotr_file.name, kind="sotr")
                     else:
-                        my_bar.progress(75, text=progress_text)
-                        st.session_state.processed_df = df
-                        st.session_state.sotr_processed = True
+                        sotr.load_from_md(markdown_text, file_id)
+                        my_bar.progress(50, text=progress_text)
+
+                        def update_sections(done, total, matrix_rows):
+                            my_bar.progress(50 + int(25 * done / total), text=f"Extracted {done}/{total} sections, {len(matrix_rows)} clauses so far")
+                            show_rows(done, total, matrix_rows)
+
+                        df, split_text = sotr.get_matrix_points(progress_callback=update_sections)
+                    if not df.empty:
+                        store.save_sections(sotr_hash, sotr.markdown_sections)
+                    # A matrix with missing sections is shown but not stored, so the next upload extracts again
+                    if not df.empty and not sotr.failed_sections:
+                        store.save_sotr_matrix(sotr_hash, df, sotr.result_version())
+                    return df
+
+                with session_job("sotr") as cancel_token, profiled_run("sotr"):
+                    sotr.cancel_token = cancel_token
+                    try:
+                        if conversion_flights.in_flight(("sotr", sotr_hash)):
+                            st.info("Another session is processing this document; waiting for its result.")
+                        # Concurrent sessions uploading the same SOTR share one conversion and extraction
+                        df = conversion_flights.do(("sotr", sotr_hash, reextract), extract, cancel_token=cancel_token)
+                        live_table.empty()
+                        st.session_state.sotr_reextract = False
+                        if sotr.failed_sections:
+                            st.warning(f"Extraction failed for {len(sotr.failed_sections)} sections "
+                                       f"({', '.join(map(str, sotr.failed_sections))}); the matrix was not stored. "
+                                       "Use Re-extract to try again.")
+                        if df.empty:
+                            st.warning("No data was extracted from the document. Please check the content and try again.")
+                        else:
+                            my_bar.progress(75, text=progress_text)
+                            st.session_state.processed_df = df
+                            st.session_state.sotr_processed = True
                         
-                        my_bar.progress(100, text="Processing complete!")
+                            my_bar.progress(100, text="Processing complete!")
                         
-                except Exception as e:
-                    st.error(f"Error in get_matrix_points: {str(e)}")
-                    st.write(f"Exception type: {type(e).__name__}")
-                    st.write(f"Exception details: {e.__dict__}")
-                    st.write(f"Traceback: {traceback.format_exc()}")
-                    st.warning("Processing completed with errors. Some sections may have been skipped.")
+                    except JobCancelled as e:
+                        live_table.empty()
+                        st.warning(f"SOTR processing stopped: {e}")
+                    except Exception as e:
+                        st.error(f"Error in get_matrix_points: {str(e)}")
+                        st.write(f"Exception type: {type(e).__name__}")
+                        st.write(f"Exception details: {e.__dict__}")
+                        st.write(f"Traceback: {traceback.format_exc()}")
+                        st.warning("Processing completed with errors. Some sections may have been skipped.")
             
         except Exception as e:
             st.error(f"Error processing SOTR document: {str(e)}")
@@ -108,10 +273,8 @@ def sotr_processing_tab(llm_client) -> None:
             }
         )
         
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            edited_df.to_excel(writer, index=False, sheet_name='Sheet1')
-        excel_data = output.getvalue()
+        # Regenerated only when the table content changes
+        excel_data = cached_workbook({'Sheet1': edited_df})
         
         st.download_button(
             label="📥 Download Current Result",
@@ -120,34 +283,42 @@ def sotr_processing_tab(llm_client) -> None:
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
 
-def convert_pdf_to_markdown(file_content, file_name, progress_callback=None):
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-        tmp_file.write(file_content)
-        tmp_file_path = tmp_file.name
-
-    try:
-        tender_pdf_markdown = PDFMarkdown(pdf_path=tmp_file_path, file_id=file_name)
-        
-        tender_in_markdown_format = tender_pdf_markdown.pdf_to_markdown(file_content, progress_callback=progress_callback)
+        if st.button("Re-extract", help="Ignore the stored matrix and extract this document again"):
+            st.session_state.sotr_reextract = True
+            st.session_state.sotr_processed = False
+            st.rerun()
+
+def convert_pdf_to_markdown(file_content, file_name, progress_callback=None, cancel_token=None):
+    store = get_document_store()
+    content_hash = file_hash(file_content)
+
+    def convert():
+        stored_markdown = store.get_markdown(content_hash)
+        if stored_markdown is not None:
+            return stored_markdown
+
+        from utils.markdown_utils_experimental import PDFMarkdown
+        tender_pdf_markdown = PDFMarkdown(file_id=file_name)
+        tender_in_markdown_format = tender_pdf_markdown.pdf_to_markdown(file_content, progress_callback=progress_callback, cancel_token=cancel_token)
+        if tender_in_markdown_format:
+            store.save_markdown(content_hash, tender_in_markdown_format, file_name, kind="tender")
         return tender_in_markdown_format
-    finally:
-        tender_pdf_markdown = None
-        gc.collect()
-        import time
-        time.sleep(0.1)
-        try:
-            if os.path.exists(tmp_file_path):
-                os.unlink(tmp_file_path)
-        except Exception as e:
-            st.warning(f"Could not delete temporary file: {str(e)}")
+
+    if conversion_flights.in_flight(("tender", content_hash)):
+        st.info("Another session is converting this document; waiting for its result.")
+    return conversion_flights.do(("tender", content_hash), convert, cancel_token=cancel_token)
 
 def tender_qa_tab(llm_client) -> None:
-    uploaded_file = st.file_uploader("Upload Tender Document", type=["pdf"], key="tender_qa_pdf_uploader")
-    st.session_state["pdf_processed"]=False
-    tender_in_markdown_format=None
-    if uploaded_file is not None:
+    uploaded_file = file_input("Upload Tender Document", type=["pdf"], key="tender_qa_pdf_uploader")
+    if uploaded_file is None:
+        return
+
+    file_content = uploaded_file.getvalue()
+    content_hash = file_hash(file_content)
+    store = get_document_store()
+
+    if st.session_state.get("tender_qa_file_hash") != content_hash:
         try:
-            file_content = uploaded_file.getvalue()
             time_taken_to_convert_PDF_to_markdown_per_page_in_minutes = 0.5
             estimated_pages = len(file_content) // 10000
             ETA_time_in_minutes = time_taken_to_convert_PDF_to_markdown_per_page_in_minutes * estimated_pages
@@ -161,26 +332,41 @@ def tender_qa_tab(llm_client) -> None:
                     progress = int(step)
                     my_bar.progress(progress, text=f"{step_name} : {int(step)}% complete")
 
-                tender_in_markdown_format = convert_pdf_to_markdown(file_content, uploaded_file.name, update_progress)
+                with session_job("tender_qa") as cancel_token, profiled_run("tender_conversion"):
+                    tender_in_markdown_format = convert_pdf_to_markdown(file_content, uploaded_file.name, update_progress, cancel_token)
 
             if not tender_in_markdown_format:
                 st.error("PDF to Markdown conversion failed: Empty result")
                 return
 
+            with st.spinner("Indexing tender document..."):
+                st.session_state["tender_qa_engine"] = TenderQA(llm_client, tender_in_markdown_format)
+                st.session_state["tender_qa_cache"] = AnswerCache(store, content_hash)
+
+            if DIGEST_ENABLED and not st.session_state["tender_qa_cache"].has_digest():
+                my_bar.progress(90, text="Answering standard questions...")
+                try:
+                    build_digest(st.session_state["tender_qa_engine"], st.session_state["tender_qa_cache"])
+                except Exception as e:
+                    # The digest only saves time later; the chat works without it
+                    print(f"Q&A digest failed: {e}")
+            st.session_state["tender_qa_file_hash"] = content_hash
+            st.session_state["history"] = store.get_qa_history(content_hash)
+
             my_bar.progress(100, text="Processing complete!")
-            st.session_state["pdf_processed"]=True
-           
+
+        except JobCancelled as e:
+            st.warning(f"Tender conversion stopped: {e}")
+            return
         except Exception as e:
             st.error(f"Error processing tender document: {str(e)}")
-    else:
-        pass
+            return
 
-    if st.session_state["pdf_processed"] and tender_in_markdown_format is not None:
-        tender_qa_chat_container(llm_client, tender_in_markdown_format)
+    tender_qa_chat_container(st.session_state["tender_qa_engine"], content_hash)
 
 
 @st.fragment
-def tender_qa_chat_container(llm_client, markdown_text) -> None:
+def tender_qa_chat_container(qa_engine, content_hash) -> None:
     st.markdown("""
         <style>
         .element-container:has(.stChatInput) {
@@ -202,62 +388,123 @@ def tender_qa_chat_container(llm_client, markdown_text) -> None:
     if "history" not in st.session_state:
         st.session_state["history"] = []
 
+    answer_cache = st.session_state.get("tender_qa_cache")
+    digest = answer_cache.digest() if answer_cache is not None else []
+    if digest:
+        with st.expander(f"Standard questions ({len(digest)})"):
+            for entry in digest:
+                st.markdown(f"**{entry['question']}**\n\n{entry['answer']}")
+
     for message in st.session_state["history"]:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
+            if message.get("note"):
+                st.caption(message["note"])
+            render_sources(message.get("sources"))
 
     if prompt:
+        history = [{"role": m["role"], "content": m["content"]} for m in st.session_state["history"]]
         st.session_state["history"].append({"role": "user", "content": prompt})
+        store = get_document_store()
+        store.append_qa_message(content_hash, "user", prompt)
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        with st.spinner("Answering..."):
-            response = llm_client.call_llm(
-                system_prompt=f"You are a helpful assistant. Use the following tender document to answer questions:\n\n{markdown_text}",
-                user_prompt=prompt
-            )
-
-            st.session_state["history"].append({"role": "assistant", "content": response})
-            with st.chat_message("assistant"):
-                st.markdown(response)
+        cached = answer_cache.lookup(prompt) if answer_cache is not None else None
+        if cached is not None:
+            entry, score = cached
+            response, sources = entry["answer"], entry["sources"]
+            note = f"Answered from the earlier question \"{entry['question']}\" ({score:.0%} match)"
+        else:
+            with st.spinner("Answering..."):
+                response, passages = qa_engine.ask(prompt, history)
+            if response is None:
+                st.error("Failed to get a response from the LLM.")
+                return
+            sources = list(dict.fromkeys(qa_engine.format_source(p) for p in passages))
+            note = None
+            if answer_cache is not None:
+                answer_cache.add(prompt, response, sources)
+
+        st.session_state["history"].append({"role": "assistant", "content": response, "sources": sources, "note": note})
+        store.append_qa_message(content_hash, "assistant", response, sources)
+        with st.chat_message("assistant"):
+            st.markdown(response)
+            if note:
+                st.caption(note)
+            render_sources(sources)
+
+def render_sources(sources) -> None:
+    if sources:
+        with st.expander("Sources"):
+            for source in sources:
+                st.markdown(f"- {source}")
 
 def compliance_check_tab() -> None:
     st.header("Compliance Check")
     
-    sotr_matrix_file = st.file_uploader("Upload SOTR Matrix", type=["xlsx"], key="compliance_check_matrix_uploader")
-    tender_file = st.file_uploader("Upload Tender Document", type=["pdf"], key="compliance_check_tender_pdf_uploader")
+    multi_bidder = st.toggle("Evaluate multiple bidders", key="compliance_check_multi_bidder")
+    sotr_matrix_file = file_input("Upload SOTR Matrix", type=["xlsx"], key="compliance_check_matrix_uploader")
+
+    if multi_bidder:
+        multi_bidder_tab(sotr_matrix_file)
+        return
+
+    tender_file = file_input("Upload Tender Document", type=["pdf"], key="compliance_check_tender_pdf_uploader")
 
     if 'compliance_results' not in st.session_state:
         st.session_state.compliance_results = None
 
     if sotr_matrix_file and tender_file:
-        if st.button("Run Compliance Check"):
-            compliance_checker = ComplianceChecker()
+        store = get_document_store()
+        finished_batches = store.count_compliance_batches(file_hash(tender_file.getvalue()), file_hash(sotr_matrix_file.getvalue()))
+        recheck = st.checkbox("Re-check all clauses", key="compliance_check_recheck",
+                              help="Ignore stored results and finished batches from earlier runs")
+        if finished_batches and not recheck:
+            st.info(f"A previous run for this tender and matrix stopped after {finished_batches} clause batches; running again resumes from there.")
+
+        if st.button("Resume Compliance Check" if finished_batches and not recheck else "Run Compliance Check"):
+            from utils.compliance_check import ComplianceChecker
+            compliance_checker = ComplianceChecker(store=store)
             
-            try:
-                with st.spinner("Loading tender document..."):
-                    compliance_checker.load_tender(tender_file.getvalue())
+            with session_job("compliance") as cancel_token, profiled_run("compliance"):
+                compliance_checker.cancel_token = cancel_token
+                try:
+                    with st.spinner("Loading tender document..."):
+                        compliance_checker.load_tender(tender_file.getvalue(), tender_file.name)
                 
-                with st.spinner("Loading SOTR matrix..."):
-                    compliance_checker.load_matrix(sotr_matrix_file.getvalue())
+                    with st.spinner("Loading SOTR matrix..."):
+                        compliance_checker.load_matrix(sotr_matrix_file.getvalue())
                 
-                with st.spinner("Checking compliance..."):
-                    results = compliance_checker.check_compliance()
+                    results = None if recheck else compliance_checker.stored_results()
+                    if results is not None:
+                        st.info("Loaded previous compliance results for this tender and matrix.")
+                    else:
+                        my_bar = st.progress(0, text="Checking compliance...")
+                        live_table = st.empty()
 
-                st.session_state.compliance_results = results
+                        def update_progress(done, total, compliance_results):
+                            my_bar.progress(done / total, text=f"Checked {done}/{total} clause batches")
+                            live_table.dataframe(compliance_results.to_frame().style.apply(color_rows, axis=1),
+                                                 use_container_width=True, hide_index=True)
 
-            except Exception as e:
-                st.error(f"Error during compliance check: {str(e)}")
+                        results = compliance_checker.check_compliance(resume=not recheck, progress_callback=update_progress)
+                        my_bar.empty()
+                        live_table.empty()
+
+                    st.session_state.compliance_results = results
+
+                except JobCancelled as e:
+                    st.warning(f"Compliance check stopped: {e}. Finished batches are kept; run it again to resume.")
+                except Exception as e:
+                    st.error(f"Error during compliance check: {str(e)}")
 
     if st.session_state.compliance_results is not None:
         st.markdown("<div style='text-align: center;'><strong>Compliance Check Matrix</strong></div>", unsafe_allow_html=True)
         styled_results = st.session_state.compliance_results.style.apply(color_rows, axis=1)
         st.dataframe(styled_results, use_container_width=True, hide_index=True)
 
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            st.session_state.compliance_results.to_excel(writer, index=False, sheet_name='Compliance Check')
-        excel_data = output.getvalue()
+        excel_data = cached_workbook({'Compliance Check': st.session_state.compliance_results})
 
         st.download_button(
             label="📥 Download Compliance Check Results",
@@ -266,6 +513,64 @@ def compliance_check_tab() -> None:
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
 
+def multi_bidder_tab(sotr_matrix_file) -> None:
+    tender_files = file_input("Upload Bidder Tender Documents", type=["pdf"], accept_multiple_files=True, key="compliance_check_bidder_pdf_uploader")
+
+    if 'multi_bidder_comparison' not in st.session_state:
+        st.session_state.multi_bidder_comparison = None
+        st.session_state.multi_bidder_workbook = None
+
+    if sotr_matrix_file and tender_files:
+        recheck = st.checkbox("Re-check all clauses", key="multi_bidder_recheck",
+                              help="Ignore stored results and finished batches from earlier runs")
+        if st.button("Run Multi-Bidder Evaluation"):
+            from utils.multi_bidder import MultiBidderEvaluation
+            evaluation = MultiBidderEvaluation(store=get_document_store())
+
+            with session_job("multi_bidder") as cancel_token, profiled_run("multi_bidder"):
+                evaluation.cancel_token = cancel_token
+                try:
+                    evaluation.load_matrix(sotr_matrix_file.getvalue())
+                    for tender_file in tender_files:
+                        evaluation.add_bidder(os.path.splitext(tender_file.name)[0], tender_file.getvalue())
+
+                    my_bar = st.progress(0, text="Converting bidder documents...")
+                    def update_progress(completed, total):
+                        my_bar.progress(completed / total, text=f"Checked {completed}/{total} clause batches")
+
+                    with st.spinner(f"Evaluating {len(tender_files)} bidders..."):
+                        evaluation.evaluate(progress_callback=update_progress, reuse_stored=not recheck)
+
+                    st.session_state.multi_bidder_comparison = evaluation.comparison_frame()
+                    st.session_state.multi_bidder_workbook = evaluation.to_workbook()
+
+                except JobCancelled as e:
+                    st.warning(f"Multi-bidder evaluation stopped: {e}. Finished batches are kept; run it again to resume.")
+                except Exception as e:
+                    st.error(f"Error during multi-bidder evaluation: {str(e)}")
+
+    if st.session_state.multi_bidder_comparison is not None:
+        st.markdown("<div style='text-align: center;'><strong>Bidder Comparison</strong></div>", unsafe_allow_html=True)
+        comparison = st.session_state.multi_bidder_comparison
+        bidder_columns = [c for c in comparison.columns if c not in ("Clause Number", "Clause")]
+        styled_comparison = comparison.style.map(color_status, subset=bidder_columns)
+        st.dataframe(styled_comparison, use_container_width=True, hide_index=True)
+
+        st.download_button(
+            label="📥 Download Bidder Comparison",
+            data=st.session_state.multi_bidder_workbook,
+            file_name="bidder_comparison.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+def color_status(status):
+    color_map = {
+        'Yes': 'background-color: #006400',  # Dark green
+        'Partial': 'background-color: #8B8000',  # Dark yellow
+        'No': 'background-color: #8B0000'  # Dark red
+    }
+    return color_map.get(status, '')
+
 def color_rows(row):
     color_map = {
         'Yes': 'background-color: #006400',  # Dark green
@@ -290,6 +595,10 @@ def main():
 
     logging.basicConfig(format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
 
+    if os.getenv("MARKER_WARMUP", "1") != "0":
+        start_model_warmup()
+    model_status_sidebar()
+
     tab1, tab2, tab3 = st.tabs(["SOTR Processing", "Tender Q&A", "Compliance Check"])
 
     llm_client = get_llm_client(env_vars)
@@ -301,5 +610,7 @@ def main():
     with tab3:
         compliance_check_tab()
 
+    profile_report_sidebar()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,65 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from utils.compliance_check import ComplianceChecker
+from utils.document_store import DocumentStore
+from utils.stub_llm import StubLLMClient
+
+TENDER = "# 1. General\n\nThe bidder shall provide support.\n\n# 2. Delivery\n\nDelivery within 30 days.\n"
+
+
+class OmittingLLMClient(StubLLMClient):
+    """Answers every compact compliance prompt but leaves out the given clause IDs."""
+
+    def __init__(self, omit=()):
+        super().__init__(latency_ms=0)
+        self.omit = set(omit)
+
+    def respond(self, system_prompt, user_prompt):
+        response = super().respond(system_prompt, user_prompt)
+        return "\n".join(line for line in response.split("\n") if line.split("|")[0] not in self.omit)
+
+
+def new_checker(llm_client, store=None):
+    checker = ComplianceChecker(store=store, llm_client=llm_client)
+    checker.tender_markdown = TENDER
+    checker.tender_hash = "tender"
+    checker.matrix_hash = "matrix"
+    checker.sotr_matrix_content = pd.DataFrame({
+        "Sr. No.": [1, 2, 3],
+        "Clause": ["Round the clock support.", "Delivery within 45 days.", "Five year warranty."],
+        "Clause Reference": ["1", "2", "3"],
+    })
+    return checker
+
+
+def test_clause_left_out_of_the_answer_is_reported_unknown():
+    results = new_checker(OmittingLLMClient(omit={"1"})).check_compliance(resume=False)
+
+    assert list(results['Clause Number']) == [0, 1, 2]
+    assert results.set_index('Clause Number').loc[1, 'Status'] == 'Unknown'
+    assert (results['Status'] != 'Unknown').sum() == 2
+
+
+def test_unknown_clauses_are_checked_again_on_resume(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    first = new_checker(OmittingLLMClient(omit={"1"}), store)
+    first.check_compliance()
+    assert first.stored_results() is None
+    assert store.count_compliance_batches("tender", "matrix") == 1
+
+    second = new_checker(OmittingLLMClient(), store)
+    results = second.check_compliance()
+    assert (results['Status'] != 'Unknown').all()
+    assert second.stored_results() is not None
+    assert store.count_compliance_batches("tender", "matrix") == 0
+
+
+def test_reference_is_read_as_a_section_number():
+    checker = new_checker(StubLLMClient(latency_ms=0))
+
+    assert checker.resolve_reference("2", "Delivery within 45 days.").startswith('Section 2, chars ')
+    assert 'Delivery within 30 days.' in checker.resolve_reference("2", "Delivery within 45 days.")
+    assert checker.resolve_reference("3-4", "Five year warranty.") == 'Section 3-4'
+    assert checker.resolve_reference("-", "Five year warranty.") == 'Not found in tender'
@@ -0,0 +1,50 @@
+from utils.markdown_sections import iter_sections
+
+DOCUMENT = """# 3 Scope of Work
+
+## 3.2 Maintenance
+
+### Preventive maintenance
+
+Quarterly visits by the bidder.
+
+### Spares
+
+Spares shall be stocked for five years.
+
+## 3.3 Training
+
+Two training sessions.
+"""
+
+
+def numbered_sections(markdown_text, open_headers=()):
+    return [(section.section_no, section.text(markdown_text).strip())
+            for section in iter_sections(markdown_text, open_headers=open_headers)
+            if section.text(markdown_text).strip()]
+
+
+def split_at(markdown_text, cut):
+    """Split like stream_matrix_points_from_pdf: cut before the last header in the first piece."""
+    last = None
+    for last in iter_sections(markdown_text[:cut]):
+        pass
+    head, tail = markdown_text[:last.start], markdown_text[last.start:]
+    return numbered_sections(head) + numbered_sections(tail, last.headers)
+
+
+def test_unnumbered_subsection_takes_its_parents_number():
+    assert numbered_sections(DOCUMENT)[:2] == [("3.2", "Quarterly visits by the bidder."),
+                                               ("3.2", "Spares shall be stocked for five years.")]
+
+
+def test_section_continued_in_next_window_keeps_parent_header():
+    cut = DOCUMENT.index("Spares shall")
+    assert split_at(DOCUMENT, cut) == numbered_sections(DOCUMENT)
+
+
+def test_open_headers_are_replaced_by_a_sibling_header():
+    tail = DOCUMENT[DOCUMENT.index("## 3.3"):]
+    open_headers = ((1, "3 Scope of Work"), (2, "3.2 Maintenance"), (3, "Spares"))
+    assert [section.headers for section in iter_sections(tail, open_headers=open_headers)][-1] == \
+        ((1, "3 Scope of Work"), (2, "3.3 Training"))
@@ -0,0 +1,37 @@
+import pytest
+
+from utils.markdown_tables import has_free_text, split_tables
+
+SECTION = """Delivery within 30 days.
+
+| Item | Quantity |
+| --- | --- |
+| Router | 4 |
+
+Warranty: 3 years.
+
+| Service | Period |
+| --- | --- |
+| AMC | 5 years |
+"""
+
+
+def test_short_requirement_counts_as_free_text():
+    assert has_free_text("Warranty: 3 years.")
+    assert not has_free_text("#### Annexure A\n\n  \n")
+
+
+def test_split_tables_keeps_document_order():
+    assert [kind for kind, _ in split_tables(SECTION.strip())] == ["text", "table", "text", "table"]
+
+
+def test_section_points_follow_document_order():
+    pytest.importorskip("marker")
+    from utils.sotr_construction import SOTRMarkdown
+
+    sotr = SOTRMarkdown(llm_client=None)
+    sotr.extract_text_points = lambda block: [f"1|{block['content'].strip()}|{block['section']}"]
+    points = sotr.extract_section_points({"section": "4.1", "content": SECTION})
+    assert [point.split("|")[1] for point in points] == [
+        "Delivery within 30 days.", "Item: Router; Quantity: 4", "Warranty: 3 years.", "Service: AMC; Period: 5 years"
+    ]
@@ -0,0 +1,61 @@
+import sys
+import types
+
+import pytest
+
+from utils import marker_models
+from utils.marker_models import MarkerModelPool
+
+MODEL_MB = 200
+
+
+@pytest.fixture
+def fake_process(monkeypatch):
+    """RSS that only grows, like a process whose allocator keeps freed pages, and 200 MB models."""
+    process = {"rss_mb": 500.0}
+
+    def load_stage_model(stage, profile="fp32"):
+        process["rss_mb"] += MODEL_MB
+        return object()
+
+    monkeypatch.setattr(marker_models, "current_rss_mb", lambda: process["rss_mb"])
+    monkeypatch.setattr(marker_models, "_load_stage_model", load_stage_model)
+    marker = types.ModuleType("marker")
+    marker.utils = types.SimpleNamespace(flush_cuda_memory=lambda: None)
+    monkeypatch.setitem(sys.modules, "marker", marker)
+    monkeypatch.setitem(sys.modules, "marker.utils", marker.utils)
+    return process
+
+
+def new_pool(budget_mb):
+    pool = MarkerModelPool(memory_budget_mb=budget_mb)
+    pool.profile = "fp32"
+    return pool
+
+
+def test_models_within_budget_are_not_reloaded_when_rss_stays_high(fake_process):
+    pool = new_pool(1000)
+    for _ in range(5):
+        for stage in ("layout", "ocr"):
+            with pool.use(stage):
+                # Page images push RSS over the budget and it never comes back down
+                fake_process["rss_mb"] += 150
+
+    assert pool.load_counts["layout"] == 1
+    assert pool.load_counts["ocr"] == 1
+    assert pool.resident_stages() == ["layout", "ocr"]
+
+
+def test_least_recently_used_idle_model_makes_room(fake_process):
+    pool = new_pool(1000)
+    for stage in ("layout", "ocr", "texify"):
+        with pool.use(stage):
+            pass
+
+    assert pool.resident_stages() == ["ocr", "texify"]
+
+
+def test_models_in_use_are_not_evicted(fake_process):
+    pool = new_pool(1000)
+    with pool.use("layout"), pool.use("ocr"), pool.use("texify"):
+        assert pool.resident_stages() == ["layout", "ocr", "texify"]
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from utils.cancellation import CancelToken, check_cancelled
+from utils.document_store import DocumentStore, file_hash
+from utils.multi_bidder import MultiBidderEvaluation
+from utils.stub_llm import StubLLMClient
+
+TENDER = "# 1. General\n\nThe bidder shall provide support.\n"
+SLOW_CALL_SECONDS = 30
+
+
+class Rerun(BaseException):
+    """Stands in for Streamlit's RerunException, which is not an Exception."""
+
+
+class SlowClauseLLMClient(StubLLMClient):
+    """Answers at once, except for prompts about the slow clause, which take SLOW_CALL_SECONDS."""
+
+    def __init__(self):
+        super().__init__(latency_ms=0)
+
+    def _create(self, system_prompt, user_prompt, model, max_tokens, history, cancel_token=None):
+        if "Slow clause" in user_prompt:
+            cancel_token.wait(SLOW_CALL_SECONDS)
+            check_cancelled(cancel_token, "slow clause")
+        return super()._create(system_prompt, user_prompt, model, max_tokens, history, cancel_token)
+
+
+def test_rerun_during_evaluation_aborts_running_llm_calls(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    store.save_markdown(file_hash(b"bidder"), TENDER)
+    evaluation = MultiBidderEvaluation(store=store, llm_client=SlowClauseLLMClient(), llm_workers=2, batch_size=1)
+    evaluation.cancel_token = CancelToken()
+    evaluation.matrix_checker.matrix_hash = "matrix"
+    evaluation.matrix_checker.sotr_matrix_content = pd.DataFrame({
+        "Sr. No.": [1, 2], "Clause": ["Fast clause on support.", "Slow clause on delivery."], "Clause Reference": ["1", "1"],
+    })
+    evaluation.add_bidder("bidder", b"bidder")
+
+    def rerun(completed, total):
+        raise Rerun()
+
+    started = time.monotonic()
+    with pytest.raises(Rerun):
+        evaluation.evaluate(progress_callback=rerun)
+
+    assert time.monotonic() - started < SLOW_CALL_SECONDS / 3
+    assert evaluation.cancel_token.cancelled
@@ -0,0 +1,53 @@
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from utils.page_cache import PageImageCache
+
+PAGE_MB = 1
+
+
+class FakePage:
+    """A pdfium page whose render() returns a 1 MB greyscale bitmap."""
+
+    def __init__(self, page_idx):
+        self.page_idx = page_idx
+        self.renders = 0
+
+    def render(self, **kwargs):
+        self.renders += 1
+        image = Image.new("L", (1024, 1024 * PAGE_MB), color=self.page_idx % 256)
+        return type("Bitmap", (), {"to_pil": lambda bitmap: image})()
+
+
+def run_stages(cache, doc, stages=("detection", "layout", "order")):
+    cached = cache.wrap(doc)
+    for stage in stages:
+        with cache.stage(stage):
+            for page in cached:
+                page.render(scale=1)
+
+
+def test_document_larger_than_the_cap_still_hits_in_later_stages():
+    doc = [FakePage(i) for i in range(10)]
+    cache = PageImageCache(max_mb=4 * PAGE_MB, spill=False)
+    run_stages(cache, doc)
+
+    stats = cache.stats()
+    assert stats["per_stage"]["layout"]["hits"] == 4
+    assert stats["per_stage"]["order"]["hits"] == 4
+    assert stats["cached_mb"] <= 4 * PAGE_MB
+    assert [page.renders for page in doc[:4]] == [1, 1, 1, 1]
+
+
+def test_spill_keeps_pages_past_the_cap_out_of_memory():
+    doc = [FakePage(i) for i in range(6)]
+    cache = PageImageCache(max_mb=2 * PAGE_MB, spill=True)
+    try:
+        run_stages(cache, doc, stages=("detection", "layout"))
+        stats = cache.stats()
+        assert stats["renders"] == 6
+        assert stats["per_stage"]["layout"] == {"renders": 0, "hits": 2, "spill_reads": 4}
+        assert stats["cached_mb"] <= 2 * PAGE_MB
+    finally:
+        cache.close()
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from utils.qa_cache import CACHE_THRESHOLD, AnswerCache, question_similarity, question_tokens
+
+
+def similarity(question, cached_question):
+    return question_similarity(question_tokens(question), question_tokens(cached_question))
+
+
+@pytest.mark.parametrize("question, cached_question", [
+    ("What is the EMD amount for Lot 1?", "What is the EMD amount for Lot 2?"),
+    ("What does clause 4.2 require?", "What does clause 4.3 require?"),
+    ("Is ISO 9001 certification required?", "Is ISO 14001 certification required?"),
+    ("What is the delivery period?", "What is the delivery period for spares?"),
+    ("What is the delivery period for spares?", "What is the delivery period?"),
+    ("What are the payment terms?", "What are the payment terms for AMC?"),
+    ("What is not the delivery period?", "What is the delivery period?"),
+    ("Which items aren't covered by the warranty?", "Which items are covered by the warranty?"),
+])
+def test_different_questions_do_not_match(question, cached_question):
+    assert similarity(question, cached_question) < CACHE_THRESHOLD
+
+
+@pytest.mark.parametrize("question, cached_question", [
+    ("What is the delivery period?", "Delivery period?"),
+    ("What's the bid validity period?", "What is the bid validity period?"),
+    ("What is the earnest money deposit?", "What is the EMD?"),
+    ("What are the penalties for delay?", "What are the liquidated damages for delay?"),
+    ("What is the delivry period?", "What is the delivery period?"),
+    ("What is the performance bank guarantee requirement?", "Performance bank guarantee requirement - what is it?"),
+])
+def test_rephrased_questions_match(question, cached_question):
+    assert similarity(question, cached_question) >= CACHE_THRESHOLD
+
+
+def test_lookup_returns_the_answer_for_the_same_lot_only():
+    cache = AnswerCache(None, "tender")
+    cache.add("What is the EMD amount for Lot 1?", "Rs. 50,000", origin="digest")
+
+    assert cache.lookup("EMD amount for Lot 1?")[0]["answer"] == "Rs. 50,000"
+    assert cache.lookup("What is the EMD amount for Lot 2?") is None
+    assert cache.stats == {"hits": 1, "misses": 1}
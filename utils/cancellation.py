@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+# Default per-job deadline in seconds for UI-started jobs; 0 means no deadline
+JOB_DEADLINE_SECONDS = float(os.getenv("TENDER_JOB_DEADLINE_SECONDS", "0"))
+
+
+class JobCancelled(Exception):
+    """Raised at the next checkpoint once a job's CancelToken is cancelled or past its deadline."""
+
+
+class CancelToken:
+    """
+    Cooperative cancellation for one job. Long-running code calls check() between
+    stages, pages and LLM calls; it raises JobCancelled once cancel() was called,
+    the deadline passed or is_alive() (e.g. "is the browser session still open")
+    returns False.
+    """
+
+    def __init__(self, deadline_seconds: Optional[float] = None, is_alive: Optional[Callable[[], bool]] = None) -> None:
+        self._event = threading.Event()
+        self.reason = None
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self.is_alive = is_alive
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.cancel("deadline exceeded")
+        elif self.is_alive is not None and not self.is_alive():
+            self.cancel("session closed")
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def wait(self, seconds: float) -> bool:
+        """Sleep up to seconds, returning early (True) once the token is cancelled."""
+        if self.deadline is not None:
+            seconds = min(seconds, self.remaining())
+        return self._event.wait(seconds) or self.cancelled
+
+    def check(self, where: str = "") -> None:
+        if self.cancelled:
+            raise JobCancelled(f"Job {self.reason}" + (f" ({where})" if where else ""))
+
+
+def check_cancelled(cancel_token: Optional[CancelToken], where: str = "") -> None:
+    if cancel_token is not None:
+        cancel_token.check(where)
+
+
+class JobRegistry:
+    """
+    One running job per key (e.g. session + tab). Starting a job cancels the
+    previous one under the same key, and a job's token is cancelled when its
+    block exits, so worker threads it started stop at their next checkpoint.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, CancelToken] = {}
+
+    @contextmanager
+    def job(self, key: str, deadline_seconds: Optional[float] = None, is_alive: Optional[Callable[[], bool]] = None):
+        token = CancelToken(JOB_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds, is_alive)
+        with self._lock:
+            previous = self._jobs.get(key)
+            self._jobs[key] = token
+        if previous is not None:
+            previous.cancel("superseded by a new job")
+        try:
+            yield token
+        finally:
+            token.cancel("job ended")
+            with self._lock:
+                if self._jobs.get(key) is token:
+                    del self._jobs[key]
+
+    def cancel(self, key: str, reason: str = "cancelled") -> None:
+        with self._lock:
+            token = self._jobs.get(key)
+        if token is not None:
+            token.cancel(reason)
+
+
+jobs = JobRegistry()
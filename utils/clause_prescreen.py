@@ -0,0 +1,185 @@
+import re
+import zlib
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+", re.IGNORECASE)
+HEADER_LINE_PATTERN = re.compile(r"^#{1,6}\s+(.*)$", re.MULTILINE)
+
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_PERMUTATIONS = [((i * 0x9E3779B1 + 1) % _MERSENNE_PRIME, (i * 0x85EBCA77 + 7) % _MERSENNE_PRIME)
+                 for i in range(1, MINHASH_PERMUTATIONS + 1)]
+
+
+def normalize_tokens(text: str) -> List[str]:
+    return [token.lower() for token in WORD_PATTERN.findall(str(text))]
+
+
+def shingle_hashes(tokens: List[str], size: int) -> List[int]:
+    if len(tokens) < size:
+        return [zlib.crc32(" ".join(tokens).encode())] if tokens else []
+    return [zlib.crc32(" ".join(tokens[i:i + size]).encode()) for i in range(len(tokens) - size + 1)]
+
+
+def minhash_signature(tokens: List[str], shingle_size: int = 3) -> Tuple[int, ...]:
+    shingles = set(shingle_hashes(tokens, shingle_size))
+    if not shingles:
+        return tuple([_MAX_HASH] * MINHASH_PERMUTATIONS)
+    return tuple(min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingles) for a, b in _PERMUTATIONS)
+
+
+def signature_similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+class TenderTextIndex:
+    """
+    Word-level index over the tender Markdown for local clause matching.
+
+    Tokens keep their character offsets into the original Markdown, so a match
+    can be cited as an exact span and attributed to the enclosing section.
+    """
+
+    def __init__(self, markdown_text: str, shingle_size: int = 5) -> None:
+        self.markdown_text = markdown_text or ""
+        self.shingle_size = shingle_size
+        self.token_starts = array("l")
+        self.token_ends = array("l")
+        tokens = []
+        for match in WORD_PATTERN.finditer(self.markdown_text):
+            tokens.append(match.group(0).lower())
+            self.token_starts.append(match.start())
+            self.token_ends.append(match.end())
+
+        # Normalised text is the tokens joined by single spaces; norm_starts maps token -> offset in it
+        self.normalized_text = " ".join(tokens)
+        self.norm_starts = array("l")
+        offset = 0
+        for token in tokens:
+            self.norm_starts.append(offset)
+            offset += len(token) + 1
+
+        self.shingle_positions: Dict[int, List[int]] = defaultdict(list)
+        for position, shingle in enumerate(shingle_hashes(tokens, shingle_size)):
+            self.shingle_positions[shingle].append(position)
+
+        self.headers = [(m.start(), m.group(1).strip()) for m in HEADER_LINE_PATTERN.finditer(self.markdown_text)]
+        self.header_starts = [start for start, _ in self.headers]
+
+    def section_at(self, char_offset: int) -> Optional[str]:
+        idx = bisect_right(self.header_starts, char_offset) - 1
+        return self.headers[idx][1] if idx >= 0 else None
+
+    def _span(self, first_token: int, token_count: int) -> Tuple[int, int]:
+        last_token = min(first_token + token_count, len(self.token_starts)) - 1
+        return self.token_starts[first_token], self.token_ends[last_token]
+
+    def find_verbatim(self, tokens: List[str]) -> Optional[Tuple[int, int]]:
+        if not tokens:
+            return None
+        position = self.normalized_text.find(" ".join(tokens))
+        while position != -1:
+            token_idx = bisect_right(self.norm_starts, position) - 1
+            # Only accept matches that start on a token boundary
+            if self.norm_starts[token_idx] == position:
+                return self._span(token_idx, len(tokens))
+            position = self.normalized_text.find(" ".join(tokens), position + 1)
+        return None
+
+    def find_fuzzy(self, tokens: List[str]) -> Tuple[float, Optional[Tuple[int, int]]]:
+        """
+        Best fraction of the clause's word n-grams found together in one region of
+        the tender, with the span of that region.
+        """
+        shingles = shingle_hashes(tokens, self.shingle_size)
+        if not shingles:
+            return 0.0, None
+
+        # Regions are overlapping pairs of clause-length buckets; count distinct n-grams per region
+        unique_shingles = set(shingles)
+        window = max(len(tokens), self.shingle_size)
+        hits = defaultdict(set)
+        first_hit = {}
+        for shingle in unique_shingles:
+            for position in self.shingle_positions.get(shingle, ()):
+                bucket = position // window
+                for key in (bucket, bucket - 1):
+                    hits[key].add(shingle)
+                    first_hit[key] = min(first_hit.get(key, position), position)
+        if not hits:
+            return 0.0, None
+
+        bucket = max(hits, key=lambda key: len(hits[key]))
+        score = len(hits[bucket]) / len(unique_shingles)
+        return score, self._span(first_hit[bucket], len(tokens))
+
+
+class ClausePrescreen:
+    """
+    Finds where the tender quotes a clause (near-)verbatim and groups near-duplicate
+    clauses so only one of each group is sent to the LLM. A quote is not evidence of
+    compliance (tenders often restate requirements), so located clauses still go to
+    the LLM, with the quoting sections as their context.
+    """
+
+    def __init__(self, tender_index: TenderTextIndex, fuzzy_threshold: float = 0.9,
+                 duplicate_threshold: float = 0.85, min_tokens: int = 8) -> None:
+        self.tender_index = tender_index
+        self.fuzzy_threshold = fuzzy_threshold
+        self.duplicate_threshold = duplicate_threshold
+        self.min_tokens = min_tokens
+
+    def locate_clause(self, clause_text: str) -> Optional[Tuple[int, int]]:
+        """Character span of the clause's (near-)verbatim quote in the tender, if any."""
+        tokens = normalize_tokens(clause_text)
+        if len(tokens) < self.min_tokens:
+            return None
+
+        span = self.tender_index.find_verbatim(tokens)
+        if span is None:
+            score, span = self.tender_index.find_fuzzy(tokens)
+            if score < self.fuzzy_threshold:
+                return None
+        return span
+
+    def group_duplicates(self, clauses: Dict) -> Dict:
+        """
+        Map each clause key to the key of its group representative (the first clause
+        seen), using exact normalised text and MinHash LSH for near duplicates.
+        """
+        representative = {}
+        exact = {}
+        signatures = {}
+        buckets = defaultdict(list)
+        rows_per_band = MINHASH_PERMUTATIONS // MINHASH_BANDS
+
+        for key, text in clauses.items():
+            tokens = normalize_tokens(text)
+            normalized = " ".join(tokens)
+            if normalized in exact:
+                representative[key] = exact[normalized]
+                continue
+            exact[normalized] = key
+            representative[key] = key
+            if len(tokens) < self.min_tokens:
+                continue
+
+            signature = minhash_signature(tokens)
+            candidates = set()
+            for band in range(MINHASH_BANDS):
+                band_key = (band, signature[band * rows_per_band:(band + 1) * rows_per_band])
+                candidates.update(buckets[band_key])
+                buckets[band_key].append(key)
+            for candidate in candidates:
+                if representative[candidate] == candidate and \
+                        signature_similarity(signature, signatures[candidate]) >= self.duplicate_threshold:
+                    representative[key] = candidate
+                    break
+            signatures[key] = signature
+
+        return representative
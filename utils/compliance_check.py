@@ -1,25 +1,86 @@
 import pandas as pd
-from utils.markdown_utils_experimental import PDFMarkdown
 from io import BytesIO, StringIO
-from utils.llm_client import LLMClient
+from utils.llm_client import make_llm_client
+import os
 import random
+import re
+import threading
 import time
-from utils.system_prompt import compliance_check_system_prompt
+from typing import Optional
+from utils.system_prompt import compliance_check_system_prompt, compliance_check_compact_system_prompt
+from utils.document_store import file_hash, result_version
+from utils.single_flight import conversion_flights
+from utils.clause_prescreen import ClausePrescreen, TenderTextIndex, normalize_tokens
+from utils.section_index import TenderSectionIndex
+from utils.result_buffer import ColumnarBuffer
+from utils.cancellation import JobCancelled, check_cancelled
+from utils.profiling import profile_stage
+
+RESULT_COLUMNS = ['Clause Number', 'Clause Text', 'Compliance Summary', 'Status', 'Reference']
+# Fast-model answers with any other status (Partial, Unknown, malformed) are re-checked by the strong model
+CONFIDENT_STATUSES = frozenset({'Yes', 'No'})
+# Compact responses carry a one-letter status and a section number
+STATUS_CODES = {'Y': 'Yes', 'P': 'Partial', 'N': 'No'}
+SENTENCE_PATTERN = re.compile(r"[^\n.!?]+[.!?]?")
+# Cross-referenced excerpts larger than this share of the tender are sent as the full text instead
+SECTION_CONTEXT_MAX_SHARE = float(os.getenv("COMPLIANCE_SECTION_CONTEXT_MAX_SHARE", "0.6"))
+
+
+def clause_key(clause_number) -> str:
+    key = str(clause_number).strip()
+    try:
+        return str(int(float(key)))
+    except ValueError:
+        return key
 
 class ComplianceChecker:
-    def __init__(self) -> None:
+    def __init__(self, store=None, llm_client=None) -> None:
         self.tender_markdown = None
         self.sotr_matrix_content = None
+        self.tender_hash = None
+        self.matrix_hash = None
+        self.store = store
+        self.llm_client = llm_client
+        self.prescreen_enabled = os.getenv("COMPLIANCE_PRESCREEN", "1") != "0"
+        self.compact_output = os.getenv("COMPLIANCE_COMPACT", "1") != "0"
+        self.section_context = os.getenv("COMPLIANCE_SECTION_CONTEXT", "1") != "0"
+        self.section_index = None
+        self.context_stats = {"cross_referenced": 0, "full_text": 0, "chars_sent": 0, "full_text_chars": 0,
+                              "full_text_rechecks": 0}
+        self._stats_lock = threading.Lock()
+        # Matrix index -> (start, end) of the clause's quote in the tender
+        self.located = {}
+        self.duplicate_of = {}
+        self.llm_rows = None
+        self.cancel_token = None
 
-    def load_tender(self, tender_file_content: bytes) -> None:
+    def load_tender(self, tender_file_content: bytes, file_name: str = None) -> None:
         """
-        Load tender data from a PDF file.
+        Load tender data from a PDF file, reusing the stored conversion when available.
         """
         try:
-            tender = PDFMarkdown()
+            self.tender_hash = file_hash(tender_file_content)
+
+            def convert():
+                if self.store is not None:
+                    stored_markdown = self.store.get_markdown(self.tender_hash)
+                    if stored_markdown is not None:
+                        return stored_markdown
+
+                from utils.markdown_utils_experimental import PDFMarkdown
+                tender = PDFMarkdown()
 
-            self.tender_markdown = tender.pdf_to_markdown(tender_file_content)
+                markdown_text = tender.pdf_to_markdown(tender_file_content, cancel_token=self.cancel_token)
+                if self.store is not None and markdown_text:
+                    self.store.save_markdown(self.tender_hash, markdown_text, file_name, kind="tender")
+                return markdown_text
+
+            # Sessions loading the same tender at the same time share one conversion
+            self.tender_markdown = conversion_flights.do(("tender", self.tender_hash), convert, cancel_token=self.cancel_token)
+            self.section_index = TenderSectionIndex(self.tender_markdown)
         
+        except JobCancelled:
+            raise
         except Exception as e:
             raise Exception(f"Error loading tender data: {str(e)}")
 
@@ -28,86 +89,356 @@ class ComplianceChecker:
         Load compliance matrix from an xlsx file.
         """
         try:
+            self.matrix_hash = file_hash(sotr_matrix_file_content)
             self.sotr_matrix_content = pd.read_excel(BytesIO(sotr_matrix_file_content))
         except Exception as e:
             raise Exception(f"Error loading SOTR matrix: {str(e)}")
-    def check_compliance(self) -> pd.DataFrame:
+
+    def iter_compliance(self, resume: bool = True):
+        """
+        Check every clause batch and yield (batches_done, total_batches, batch_results)
+        as each finishes. Each finished batch is checkpointed in the store; with
+        resume, batches checkpointed by an earlier interrupted run are reused, so
+        only the unfinished ones go to the LLM.
+        """
         if self.tender_markdown is None or self.sotr_matrix_content is None:
             raise Exception("Tender document or SOTR matrix not loaded.")
 
-        compliance_results = pd.DataFrame(columns=['Clause Number', 'Clause Text', 'Compliance Summary', 'Status'])
-        compliance_checker_expert = LLMClient()
-
-        for i in range(0, len(self.sotr_matrix_content), 10):
-            rows = self.sotr_matrix_content.iloc[i:i+10]
-            
-            system_prompt = """
-                You are a compliance analyst tasked with comparing a list of compliance clauses against extracted text from a tender document. For each clause, perform the following steps:
-
-                Carefully read and analyze the clause text.
-                Compare the clause requirements with the tender document text.
-                Provide a concise compliance summary (max 50 words) stating whether the tender document meets, partially meets, or does not meet the clause requirements.
-                Identify and extract the specific reference from the tender document that supports your compliance summary.
-                Assign a status:
-
-                "Yes" if fully compliant
-                "Partial" if partially compliant
-                "No" if not compliant
-
-
-
-                Respond in CSV format using | as the separator, with the following columns:
-                Clause Number|Clause Text|Compliance Summary|Status|Reference
-                Ensure that any | characters within text fields are properly escaped or replaced with an appropriate alternative.
-                Do not include any additional explanations or text outside of this CSV format. The first line of your response should be the CSV header, followed immediately by the data rows.
-                Example input:
-                Compliance clauses:
-
-                "The supplier must provide 24/7 customer support."
-                "All products must be delivered within 5 business days."
-
-                Tender document text:
-                "Our company offers customer support from 9 AM to 5 PM, Monday through Friday. We guarantee delivery of all products within 3-7 business days, depending on the customer's location."
-                Example output:
-                Clause Number|Clause Text|Compliance Summary|Status|Reference
-                1|The supplier must provide 24/7 customer support.|Tender document states support is only available during limited hours on weekdays. Does not meet 24/7 requirement.|No|"Our company offers customer support from 9 AM to 5 PM, Monday through Friday."
-                2|All products must be delivered within 5 business days.|Tender document guarantees delivery within 3-7 business days, which partially meets the requirement but may exceed 5 days.|Partial|"We guarantee delivery of all products within 3-7 business days, depending on the customer's location."
-                Analyze the provided compliance clauses and tender document text, then generate the CSV output as described above.
-            """
-            user_prompt = f"Tender Document:\n{self.tender_markdown}\n\nClauses:\n" + "\n".join([f"{index}, {row['Clause']}" for index, row in rows.iterrows()])
-
-            max_retries = 5
-            base_delay = 1
-            for attempt in range(max_retries):
-                try:
-                    compliance_checker_expert_answers = compliance_checker_expert.call_llm(
-                        system_prompt=compliance_check_system_prompt,
-                        user_prompt=user_prompt
-                    )
-                    break
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        raise Exception(f"Max retries reached. Last error: {str(e)}")
-                    
-                    delay = (base_delay * 2 ** attempt) + (random.randint(0, 1000) / 1000)
-                    print(f"Error calling LLM API. Retrying in {delay:.2f} seconds...")
-                    time.sleep(delay)
-            
-            print(compliance_checker_expert_answers)
-
-            try:
-                parsed_answers = pd.read_csv(StringIO(compliance_checker_expert_answers), sep='|', quotechar='"', escapechar='\\')
-            except pd.errors.ParserError:
-                parsed_answers = self.parse_csv_manually(compliance_checker_expert_answers)
-
-            required_columns = ['Clause Number', 'Clause Text', 'Compliance Summary', 'Status', 'Reference']
-            for col in required_columns:
-                if col not in parsed_answers.columns:
-                    parsed_answers[col] = 'Unknown'
-
-            compliance_results = pd.concat([compliance_results, parsed_answers[required_columns]], ignore_index=True)
-
-        return compliance_results
+        with profile_stage("compliance.prescreen"):
+            self.prescreen()
+        checkpoints = self.load_checkpoints() if resume else {}
+        batches = list(self.iter_batches())
+
+        for batch_index, rows in enumerate(batches):
+            parsed_answers = self.checkpointed_batch(checkpoints, batch_index, rows)
+            if parsed_answers is None:
+                check_cancelled(self.cancel_token, f"batch {batch_index + 1}/{len(batches)}")
+                parsed_answers = self.check_batch(rows)
+                self.save_checkpoint(batch_index, rows, parsed_answers)
+            yield batch_index + 1, len(batches), parsed_answers
+
+    def check_compliance(self, resume: bool = True, progress_callback=None) -> pd.DataFrame:
+        """
+        Run iter_compliance into a ColumnarBuffer. progress_callback receives
+        (batches_done, total_batches, buffer) after every batch, for live display.
+        The final results are saved and the checkpoints dropped once every batch is done.
+        """
+        compliance_results = ColumnarBuffer(RESULT_COLUMNS)
+        for done, total, parsed_answers in self.iter_compliance(resume):
+            compliance_results.append_frame(parsed_answers)
+            if progress_callback:
+                progress_callback(done, total, compliance_results)
+
+        if self.llm_client is not None:
+            print(f"LLM tiers: {self.llm_client.tier_summary()}")
+        print(f"Tender context: {self.context_stats}")
+        results = self.merge_results(compliance_results.to_frame())
+        self.save_results(results)
+        return results
+
+    def result_version(self) -> str:
+        """Version stored results are keyed on: they are only reused for the same prompt, models and settings."""
+        if self.llm_client is None:
+            self.llm_client = make_llm_client()
+        prompt = compliance_check_compact_system_prompt if self.compact_output else compliance_check_system_prompt
+        return result_version(prompt, self.llm_client.default_model, self.llm_client.fast_model,
+                              self.prescreen_enabled, self.section_context)
+
+    def stored_results(self) -> Optional[pd.DataFrame]:
+        if self.store is None:
+            return None
+        return self.store.get_compliance_results(self.tender_hash, self.matrix_hash, self.result_version())
+
+    def save_results(self, results: pd.DataFrame) -> None:
+        """
+        Store the final results and drop the checkpoints, unless some clause is still
+        Unknown (an LLM failure or a clause left out of the answer): such partial
+        results are not stored, so the next run checks those clauses again.
+        """
+        if self.store is None:
+            return
+        unknown = int((results['Status'] == 'Unknown').sum())
+        if unknown:
+            print(f"Not storing compliance results: {unknown}/{len(results)} clauses are Unknown")
+            return
+        self.store.save_compliance_results(self.tender_hash, self.matrix_hash, results, self.result_version())
+        self.store.clear_compliance_batches(self.tender_hash, self.matrix_hash)
+
+    def resume_compliance(self, progress_callback=None) -> pd.DataFrame:
+        """Entry point for restarting an interrupted run: same as check_compliance, skipping finished batches."""
+        return self.check_compliance(resume=True, progress_callback=progress_callback)
+
+    def load_checkpoints(self) -> dict:
+        if self.store is None:
+            return {}
+        checkpoints = self.store.get_compliance_batches(self.tender_hash, self.matrix_hash)
+        if checkpoints:
+            print(f"Resuming compliance check: {len(checkpoints)} batches already done")
+        return checkpoints
+
+    def checkpointed_batch(self, checkpoints: dict, batch_index: int, rows: pd.DataFrame):
+        """
+        The stored results for this batch, if it was checkpointed with exactly these
+        clauses and none of them is Unknown; otherwise the batch is checked again.
+        """
+        checkpoint = checkpoints.get(batch_index)
+        if checkpoint is None or checkpoint["clause_ids"] != [clause_key(index) for index in rows.index]:
+            return None
+        if (checkpoint["results"]['Status'] == 'Unknown').any():
+            return None
+        return checkpoint["results"]
+
+    def save_checkpoint(self, batch_index: int, rows: pd.DataFrame, parsed_answers: pd.DataFrame) -> None:
+        if self.store is not None:
+            self.store.save_compliance_batch(self.tender_hash, self.matrix_hash, batch_index,
+                                             [clause_key(index) for index in rows.index], parsed_answers)
+
+    def prescreen(self) -> None:
+        """
+        Collapse near-duplicate clauses, leaving their representatives in
+        self.llm_rows, and find where the tender quotes each representative.
+        Located clauses are batched together and checked against the quoting sections.
+        """
+        self.located = {}
+        self.duplicate_of = {}
+        if self.prescreen_enabled:
+            prescreen = ClausePrescreen(TenderTextIndex(self.tender_markdown))
+            clauses = {index: row['Clause'] for index, row in self.sotr_matrix_content.iterrows()}
+            self.duplicate_of = prescreen.group_duplicates(clauses)
+            for index, representative in self.duplicate_of.items():
+                if index == representative:
+                    span = prescreen.locate_clause(clauses[index])
+                    if span is not None:
+                        self.located[index] = span
+
+        llm_indexes = [index for index in self.sotr_matrix_content.index if self.duplicate_of.get(index, index) == index]
+        self.llm_rows = self.sotr_matrix_content.loc[llm_indexes]
+        print(f"Prescreen: {len(self.located)} quoted in the tender, "
+              f"{sum(1 for i, r in self.duplicate_of.items() if i != r)} duplicates collapsed, "
+              f"{len(self.llm_rows)}/{len(self.sotr_matrix_content)} clauses sent to the LLM")
+
+    def merge_results(self, llm_results: pd.DataFrame) -> pd.DataFrame:
+        """Add duplicate clauses to the LLM results, in matrix order."""
+        rows = llm_results.to_dict('records')
+        by_clause = {clause_key(row['Clause Number']): row for row in rows}
+
+        for index, row in self.sotr_matrix_content.iterrows():
+            representative = self.duplicate_of.get(index, index)
+            if representative != index:
+                source = by_clause.get(clause_key(representative))
+                if source is not None:
+                    rows.append({**source, 'Clause Number': index, 'Clause Text': row['Clause'],
+                                 'Compliance Summary': f"{source['Compliance Summary']} (same as clause {representative})"})
+                else:
+                    rows.append({'Clause Number': index, 'Clause Text': row['Clause'],
+                                 'Compliance Summary': f"Duplicate of clause {representative}", 'Status': 'Unknown', 'Reference': 'Unknown'})
+
+        order = {clause_key(index): position for position, index in enumerate(self.sotr_matrix_content.index)}
+        rows.sort(key=lambda row: order.get(clause_key(row['Clause Number']), len(order)))
+        return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+    def iter_batches(self, batch_size: int = 10):
+        """Batches of the clauses to check; clauses quoted in the tender come last, in batches of their own."""
+        rows = self.llm_rows if self.llm_rows is not None else self.sotr_matrix_content
+        located = rows.index.isin(list(self.located))
+        for group in (rows[~located], rows[located]):
+            for i in range(0, len(group), batch_size):
+                yield group.iloc[i:i+batch_size]
+
+    def check_batch(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """
+        Check one batch of matrix rows against the tender. The batch goes to the fast
+        model first; clauses it leaves out, marks Partial or answers with an unknown
+        status are re-checked by the strong model. Clauses judged non-compliant or
+        not addressed from a section excerpt are re-checked against the full tender,
+        since the answer may sit in a section the excerpt left out.
+        """
+        if self.llm_client is None:
+            self.llm_client = make_llm_client()
+
+        parsed_answers, tier = self.ask_batch(rows)
+        if tier == "fast":
+            escalate = self.rows_to_escalate(rows, parsed_answers)
+            if escalate:
+                print(f"Escalating {len(escalate)}/{len(rows)} clauses to the strong model")
+                escalated_keys = {clause_key(index) for index in escalate}
+                kept = parsed_answers[~parsed_answers['Clause Number'].map(clause_key).isin(escalated_keys)]
+                strong_answers, _ = self.ask_batch(rows.loc[escalate], tier="strong")
+                parsed_answers = pd.concat([kept, strong_answers], ignore_index=True)
+
+        unanswered = self.rows_not_found(rows, parsed_answers)
+        if unanswered and self.batch_excerpt(rows) is not None:
+            print(f"Re-checking {len(unanswered)}/{len(rows)} clauses against the full tender")
+            with self._stats_lock:
+                self.context_stats["full_text_rechecks"] += 1
+            unanswered_keys = {clause_key(index) for index in unanswered}
+            kept = parsed_answers[~parsed_answers['Clause Number'].map(clause_key).isin(unanswered_keys)]
+            full_text_answers, _ = self.ask_batch(rows.loc[unanswered], full_text=True)
+            parsed_answers = pd.concat([kept, full_text_answers], ignore_index=True)
+
+        return self.add_missing_rows(rows, parsed_answers[RESULT_COLUMNS])
+
+    @staticmethod
+    def add_missing_rows(rows: pd.DataFrame, parsed_answers: pd.DataFrame) -> pd.DataFrame:
+        """Add an Unknown row for every clause of the batch the LLM left out of its answer."""
+        answered = set(parsed_answers['Clause Number'].map(clause_key))
+        missing = [[index, row['Clause'], 'Not in the LLM answer; run the check again', 'Unknown', 'Unknown']
+                   for index, row in rows.iterrows() if clause_key(index) not in answered]
+        if not missing:
+            return parsed_answers
+        print(f"LLM left out {len(missing)}/{len(rows)} clauses: {[record[0] for record in missing]}")
+        return pd.concat([parsed_answers, pd.DataFrame(missing, columns=RESULT_COLUMNS)], ignore_index=True)
+
+    def ask_batch(self, rows: pd.DataFrame, tier: str = None, full_text: bool = False):
+        """
+        Send one batch to the LLM, retrying with exponential backoff when no answer
+        comes back. Returns (parsed rows with all required columns, tier used).
+        """
+        user_prompt = self.batch_context(rows, full_text) + "\n\nClauses:\n" + "\n".join([f"{index}, {row['Clause']}" for index, row in rows.iterrows()])
+
+        if self.compact_output:
+            system_prompt, parse = compliance_check_compact_system_prompt, lambda response: self.parse_compact_answers(response, rows)
+        else:
+            system_prompt, parse = compliance_check_system_prompt, self.parse_answers
+
+        max_retries = 5
+        base_delay = 1
+        for attempt in range(max_retries):
+            with profile_stage("compliance.llm"):
+                compliance_checker_expert_answers, tier_used = self.llm_client.call_llm_tiered(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    accept=lambda response: len(parse(response)) > 0,
+                    tier=tier,
+                    cancel_token=self.cancel_token
+                )
+            if compliance_checker_expert_answers is not None:
+                break
+            if attempt == max_retries - 1:
+                raise Exception("Max retries reached. The LLM returned no answer.")
+
+            delay = (base_delay * 2 ** attempt) + (random.randint(0, 1000) / 1000)
+            print(f"Error calling LLM API. Retrying in {delay:.2f} seconds...")
+            if self.cancel_token is not None:
+                # Wake up early if the job is cancelled during the backoff
+                self.cancel_token.wait(delay)
+                self.cancel_token.check("compliance retry")
+            else:
+                time.sleep(delay)
+
+        print(compliance_checker_expert_answers)
+        return parse(compliance_checker_expert_answers), tier_used
+
+    def get_section_index(self) -> TenderSectionIndex:
+        if self.section_index is None:
+            self.section_index = TenderSectionIndex(self.tender_markdown)
+        return self.section_index
+
+    def batch_excerpt(self, rows: pd.DataFrame) -> Optional[str]:
+        """
+        The part of the tender to check one batch against: the sections quoting its
+        clauses when the prescreen located all of them, else the sections its Clause
+        References point to when every clause resolves to at least one. None means
+        the full text.
+        """
+        excerpt = None
+        if len(rows) and all(index in self.located for index in rows.index):
+            section_index = self.get_section_index()
+            excerpt = section_index.excerpt([section_index.enclosing_span(*self.located[index]) for index in rows.index])
+        elif self.section_context and 'Clause Reference' in rows.columns:
+            excerpt = self.get_section_index().context_for(rows['Clause Reference'])
+        if excerpt is not None and len(excerpt) > SECTION_CONTEXT_MAX_SHARE * len(self.tender_markdown):
+            excerpt = None
+        return excerpt
+
+    def batch_context(self, rows: pd.DataFrame, full_text: bool = False) -> str:
+        """The tender text for one batch: its excerpt, or the whole tender with full_text or without one."""
+        excerpt = None if full_text else self.batch_excerpt(rows)
+
+        with self._stats_lock:
+            self.context_stats["full_text_chars"] += len(self.tender_markdown)
+            if excerpt is None:
+                self.context_stats["full_text"] += 1
+                self.context_stats["chars_sent"] += len(self.tender_markdown)
+            else:
+                self.context_stats["cross_referenced"] += 1
+                self.context_stats["chars_sent"] += len(excerpt)
+
+        if excerpt is None:
+            return f"Tender Document:\n{self.tender_markdown}"
+        return f"Tender Document (sections cross-referenced by these clauses):\n{excerpt}"
+
+    def parse_answers(self, response: str) -> pd.DataFrame:
+        try:
+            parsed_answers = pd.read_csv(StringIO(response), sep='|', quotechar='"', escapechar='\\')
+        except (pd.errors.ParserError, pd.errors.EmptyDataError):
+            parsed_answers = self.parse_csv_manually(response)
+
+        for col in RESULT_COLUMNS:
+            if col not in parsed_answers.columns:
+                parsed_answers[col] = 'Unknown'
+        return parsed_answers[RESULT_COLUMNS]
+
+    def parse_compact_answers(self, response: str, rows: pd.DataFrame) -> pd.DataFrame:
+        """
+        Parse ID|S|Summary|Ref lines and rejoin the clause text from the matrix and
+        a reference snippet from the tender. Lines for unknown IDs (or a header) are skipped.
+        """
+        clauses = {clause_key(index): (index, row['Clause']) for index, row in rows.iterrows()}
+        records = []
+        for line in response.strip().split('\n'):
+            parts = [part.strip().strip('"') for part in line.split('|')]
+            if len(parts) < 3 or clause_key(parts[0]) not in clauses:
+                continue
+            index, clause_text = clauses[clause_key(parts[0])]
+            status = STATUS_CODES.get(parts[1].upper(), parts[1].capitalize())
+            if status not in STATUS_CODES.values():
+                status = 'Unknown'
+            reference = self.resolve_reference(parts[3] if len(parts) > 3 else '', clause_text)
+            records.append([index, clause_text, parts[2], status, reference])
+        return pd.DataFrame(records, columns=RESULT_COLUMNS)
+
+    def resolve_reference(self, pointer: str, clause_text: str) -> str:
+        """
+        Turn a section number from a compact answer into the 'Section x, chars a-b:
+        "snippet"' form, picking the sentence of the section that shares the most
+        words with the clause.
+        """
+        pointer = pointer.strip().rstrip('.')
+        if not pointer or pointer == '-':
+            return 'Not found in tender'
+
+        sections = self.get_section_index().sections_for_number(pointer.removeprefix('Section').strip())
+        if not sections:
+            return f'Section {pointer}'
+
+        clause_tokens = set(normalize_tokens(clause_text))
+        best_score, best_span = -1, (sections[0].content_start, sections[0].content_start)
+        for section in sections:
+            for match in SENTENCE_PATTERN.finditer(self.tender_markdown, section.content_start, section.end):
+                score = len(clause_tokens.intersection(normalize_tokens(match.group(0))))
+                if score > best_score:
+                    best_score, best_span = score, match.span()
+        return self._reference_text(pointer, *best_span)
+
+    def _reference_text(self, section_no, start: int, end: int) -> str:
+        snippet = self.tender_markdown[start:end].strip().replace('|', '/').replace('\n', ' ')
+        if len(snippet) > 300:
+            snippet = snippet[:300] + '...'
+        return f'Section {section_no}, chars {start}-{end}: "{snippet}"'
+
+    def rows_not_found(self, rows: pd.DataFrame, parsed_answers: pd.DataFrame) -> list:
+        """Matrix indexes answered No or with no supporting tender section."""
+        unanswered = {clause_key(number) for number, status, reference
+                      in zip(parsed_answers['Clause Number'], parsed_answers['Status'], parsed_answers['Reference'])
+                      if str(status).strip().strip('"') == 'No' or str(reference).strip() in ('-', 'Not found in tender')}
+        return [index for index in rows.index if clause_key(index) in unanswered]
+
+    def rows_to_escalate(self, rows: pd.DataFrame, parsed_answers: pd.DataFrame) -> list:
+        """Matrix indexes whose fast-model answer is missing, Partial or not a known status."""
+        statuses = {clause_key(number): str(status).strip().strip('"')
+                    for number, status in zip(parsed_answers['Clause Number'], parsed_answers['Status'])}
+        return [index for index in rows.index if statuses.get(clause_key(index)) not in CONFIDENT_STATUSES]
 
     def parse_csv_manually(self, csv_string):
         lines = csv_string.strip().split('\n')
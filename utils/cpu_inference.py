@@ -0,0 +1,161 @@
+import argparse
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+# CPU inference profile for the marker/surya models.
+#   fp32 - models as marker loads them (default)
+#   bf16 - load in bfloat16 where the CPU supports it natively, else fall back to fp32
+#   int8 - dynamic int8 quantization of the Linear layers of QUANTIZE_STAGES
+CPU_PROFILE = os.getenv("MARKER_CPU_PROFILE", "fp32")
+TORCH_THREADS = int(os.getenv("MARKER_TORCH_THREADS", "0"))  # 0 = torch default (all cores)
+TORCH_INTEROP_THREADS = int(os.getenv("MARKER_TORCH_INTEROP_THREADS", "0"))
+# Detection and layout are convolutional, dynamic quantization does not help them
+QUANTIZE_STAGES = tuple(s.strip() for s in os.getenv("MARKER_QUANTIZE_STAGES", "edit,order,ocr,texify").split(",") if s.strip())
+# "auto" sizes the batch multiplier from available RAM; a number fixes it (3 was the old hard-coded value)
+BATCH_MULTIPLIER = os.getenv("MARKER_BATCH_MULTIPLIER", "3")
+BATCH_UNIT_MB = int(os.getenv("MARKER_BATCH_UNIT_MB", "1024"))
+MAX_BATCH_MULTIPLIER = int(os.getenv("MARKER_MAX_BATCH_MULTIPLIER", "8"))
+
+_threads_applied = False
+_threads_lock = threading.Lock()
+
+
+def apply_thread_settings() -> None:
+    """Set torch intra-/inter-op thread counts once, before the first model runs."""
+    global _threads_applied
+    with _threads_lock:
+        if _threads_applied:
+            return
+        _threads_applied = True
+        if not TORCH_THREADS and not TORCH_INTEROP_THREADS:
+            return
+        import torch
+        if TORCH_THREADS:
+            torch.set_num_threads(TORCH_THREADS)
+        if TORCH_INTEROP_THREADS:
+            try:
+                torch.set_num_interop_threads(TORCH_INTEROP_THREADS)
+            except RuntimeError as e:
+                # Only allowed before any inter-op parallel work has started
+                print(f"Could not set inter-op threads: {e}")
+        print(f"Torch threads: intra-op {torch.get_num_threads()}, inter-op {torch.get_num_interop_threads()}")
+
+
+def on_cpu() -> bool:
+    from marker.settings import settings
+    return settings.TORCH_DEVICE_MODEL == "cpu"
+
+
+def bf16_supported() -> bool:
+    import torch
+    try:
+        return torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported()
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def resolve_profile(profile: Optional[str] = None) -> str:
+    """The profile that will actually be used: anything but fp32 needs a CPU device, bf16 needs CPU support."""
+    profile = profile or CPU_PROFILE
+    if profile not in ("fp32", "bf16", "int8"):
+        raise Exception(f"Unknown MARKER_CPU_PROFILE {profile!r}, expected fp32, bf16 or int8")
+    if profile == "fp32" or not on_cpu():
+        return "fp32"
+    if profile == "bf16" and not bf16_supported():
+        print("bf16 is not supported natively on this CPU, using fp32")
+        return "fp32"
+    return profile
+
+
+def load_kwargs(profile: str) -> Dict:
+    """Extra device/dtype arguments for marker's setup_*_model loaders."""
+    if profile == "bf16":
+        import torch
+        return {"device": "cpu", "dtype": torch.bfloat16}
+    return {}
+
+
+def optimize_model(stage: str, model, profile: str):
+    """Post-load step of the profile: dynamic int8 quantization for the Linear-heavy stages."""
+    if profile != "int8" or stage not in QUANTIZE_STAGES or model is None:
+        return model
+    import torch
+    # inplace keeps attributes marker attaches to the model, like .processor
+    torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def available_memory_mb() -> float:
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return BATCH_UNIT_MB * 3
+
+
+def default_batch_multiplier() -> int:
+    """MARKER_BATCH_MULTIPLIER, or with "auto" one unit per BATCH_UNIT_MB of free RAM (within the memory budget)."""
+    if BATCH_MULTIPLIER != "auto":
+        return int(BATCH_MULTIPLIER)
+    from utils.marker_models import MEMORY_BUDGET_MB, current_rss_mb
+    free_mb = available_memory_mb()
+    if MEMORY_BUDGET_MB:
+        free_mb = min(free_mb, MEMORY_BUDGET_MB - current_rss_mb())
+    return max(1, min(MAX_BATCH_MULTIPLIER, int(free_mb // BATCH_UNIT_MB)))
+
+
+def benchmark(pdf_path: str, profiles: List[str], batch_multipliers: List[int], repeats: int = 1) -> List[Dict]:
+    """Convert pdf_path once per profile and batch multiplier with a fresh model pool and report pages/sec."""
+    from utils.marker_models import MarkerModelPool, convert_pdf_windowed, count_pdf_pages
+    from utils.markdown_utils_experimental import PDFMarkdown
+
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+    pages = count_pdf_pages(pdf_bytes)
+    apply_thread_settings()
+    converter = PDFMarkdown(file_id="benchmark")
+
+    results = []
+    for profile in profiles:
+        started = time.perf_counter()
+        pool = MarkerModelPool(profile=profile).load_all()
+        load_seconds = time.perf_counter() - started
+        # Warm-up pass so lazy initialisation is not counted
+        converter.convert_single_pdf(pdf_bytes, pool, max_pages=1, extract_figures=False)
+        for batch_multiplier in batch_multipliers:
+            started = time.perf_counter()
+            for _ in range(repeats):
+                convert_pdf_windowed(converter.convert_single_pdf, pdf_bytes, pool, batch_multiplier=batch_multiplier, image_mode="off")
+            seconds = (time.perf_counter() - started) / repeats
+            results.append({"profile": pool.profile, "batch_multiplier": batch_multiplier, "pages": pages,
+                            "load_seconds": round(load_seconds, 2), "seconds": round(seconds, 2),
+                            "pages_per_second": round(pages / seconds, 3) if seconds else 0.0})
+            print(results[-1])
+        pool.unload_all()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark PDF conversion throughput per CPU inference profile.")
+    parser.add_argument("pdf_path")
+    parser.add_argument("--profiles", default="fp32,int8", help="comma separated: fp32, bf16, int8")
+    parser.add_argument("--batch-multipliers", default=str(default_batch_multiplier()), help="comma separated integers")
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+
+    results = benchmark(args.pdf_path, args.profiles.split(","),
+                        [int(b) for b in args.batch_multipliers.split(",")], args.repeats)
+    baseline = results[0]["pages_per_second"] if results else 0.0
+    print(f"{'profile':<8} {'batch':>5} {'pages/s':>8} {'speedup':>8}")
+    for result in results:
+        speedup = result["pages_per_second"] / baseline if baseline else 0.0
+        print(f"{result['profile']:<8} {result['batch_multiplier']:>5} {result['pages_per_second']:>8} {speedup:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from io import StringIO
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    file_hash TEXT PRIMARY KEY,
+    file_name TEXT,
+    kind TEXT,
+    markdown_path TEXT,
+    created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_hash TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    section_no TEXT,
+    content TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sections_file_hash ON sections (file_hash, position);
+CREATE TABLE IF NOT EXISTS sotr_matrices (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_hash TEXT NOT NULL,
+    version TEXT,
+    blob_path TEXT NOT NULL,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sotr_matrices_file_hash ON sotr_matrices (file_hash);
+CREATE TABLE IF NOT EXISTS compliance_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tender_hash TEXT NOT NULL,
+    matrix_hash TEXT NOT NULL,
+    version TEXT,
+    blob_path TEXT NOT NULL,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_compliance_results_tender ON compliance_results (tender_hash, matrix_hash);
+CREATE INDEX IF NOT EXISTS idx_compliance_results_matrix ON compliance_results (matrix_hash);
+CREATE TABLE IF NOT EXISTS compliance_batches (
+    tender_hash TEXT NOT NULL,
+    matrix_hash TEXT NOT NULL,
+    batch_index INTEGER NOT NULL,
+    clause_ids TEXT NOT NULL,
+    results TEXT NOT NULL,
+    created_at TEXT,
+    PRIMARY KEY (tender_hash, matrix_hash, batch_index)
+);
+CREATE TABLE IF NOT EXISTS qa_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_hash TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT,
+    sources TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_qa_history_file_hash ON qa_history (file_hash, id);
+CREATE TABLE IF NOT EXISTS qa_answers (
+    file_hash TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    sources TEXT,
+    origin TEXT,
+    created_at TEXT,
+    PRIMARY KEY (file_hash, normalized)
+);
+"""
+
+# Columns added after the first release, for stores created before them
+MIGRATIONS = {
+    "sotr_matrices": {"version": "TEXT"},
+    "compliance_results": {"version": "TEXT"},
+}
+
+
+def file_hash(file_content: bytes) -> str:
+    return hashlib.sha256(file_content).hexdigest()
+
+
+def result_version(*parts) -> str:
+    """Short digest of whatever produced a stored result (prompt, models, settings)."""
+    return hashlib.sha256("\n".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:16]
+
+
+class DocumentStore:
+    """
+    Local store for converted tenders and everything derived from them.
+
+    Metadata lives in SQLite; Markdown and DataFrames are written as files in a
+    blob directory. Everything is keyed by the SHA-256 of the uploaded file, so
+    the same PDF is only converted and extracted once across sessions.
+    """
+
+    def __init__(self, root_dir: Optional[str] = None) -> None:
+        self.root_dir = root_dir or os.getenv("TENDER_STORE_DIR", ".tender_store")
+        self.blob_dir = os.path.join(self.root_dir, "blobs")
+        self.db_path = os.path.join(self.root_dir, "store.db")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+
+    @staticmethod
+    def _migrate(conn) -> None:
+        for table, columns in MIGRATIONS.items():
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for column, column_type in columns.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _blob_path(self, *parts: str) -> str:
+        path = os.path.join(self.blob_dir, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().isoformat()
+
+    def _write_blob(self, path: str, text: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+
+    def _write_frame(self, path: str, df: pd.DataFrame) -> None:
+        self._write_blob(path, df.to_json(orient="split", index=False))
+
+    @staticmethod
+    def _read_frame(path: str) -> Optional[pd.DataFrame]:
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as file:
+            return pd.read_json(StringIO(file.read()), orient="split", dtype=False)
+
+    # Markdown
+
+    def save_markdown(self, file_hash: str, markdown_text: str, file_name: str = None, kind: str = None) -> str:
+        path = self._blob_path("markdown", f"{file_hash}.md")
+        self._write_blob(path, markdown_text)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO documents (file_hash, file_name, kind, markdown_path, created_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(file_hash) DO UPDATE SET markdown_path = excluded.markdown_path, "
+                "file_name = COALESCE(excluded.file_name, documents.file_name), kind = COALESCE(excluded.kind, documents.kind)",
+                (file_hash, file_name, kind, path, self._now())
+            )
+        return path
+
+    def get_markdown(self, file_hash: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT markdown_path FROM documents WHERE file_hash = ?", (file_hash,)).fetchone()
+        if row is None or not row[0] or not os.path.exists(row[0]):
+            return None
+        with open(row[0], "r", encoding="utf-8") as file:
+            return file.read()
+
+    def list_documents(self, kind: str = None) -> List[Dict]:
+        query = "SELECT file_hash, file_name, kind, created_at FROM documents"
+        params = ()
+        if kind:
+            query += " WHERE kind = ?"
+            params = (kind,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY created_at DESC", params).fetchall()
+        return [{"file_hash": r[0], "file_name": r[1], "kind": r[2], "created_at": r[3]} for r in rows]
+
+    # Section splits
+
+    def save_sections(self, file_hash: str, sections: List[Dict]) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM sections WHERE file_hash = ?", (file_hash,))
+            conn.executemany(
+                "INSERT INTO sections (file_hash, position, section_no, content) VALUES (?, ?, ?, ?)",
+                [(file_hash, i, s["section"], s["content"]) for i, s in enumerate(sections)]
+            )
+
+    def get_sections(self, file_hash: str) -> Optional[List[Dict]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT section_no, content FROM sections WHERE file_hash = ? ORDER BY position", (file_hash,)
+            ).fetchall()
+        return [{"section": r[0], "content": r[1]} for r in rows] or None
+
+    # SOTR matrices
+
+    # Stored results are only served back for the same version (see result_version); a
+    # matrix extracted with another prompt or model is replaced on the next save.
+
+    def save_sotr_matrix(self, file_hash: str, df: pd.DataFrame, version: str = "") -> None:
+        path = self._blob_path("sotr", f"{file_hash}.json")
+        self._write_frame(path, df)
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM sotr_matrices WHERE file_hash = ?", (file_hash,))
+            conn.execute(
+                "INSERT INTO sotr_matrices (file_hash, version, blob_path, created_at) VALUES (?, ?, ?, ?)",
+                (file_hash, version, path, self._now())
+            )
+
+    def get_sotr_matrix(self, file_hash: str, version: str = "") -> Optional[pd.DataFrame]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT blob_path FROM sotr_matrices WHERE file_hash = ? AND version = ?", (file_hash, version)
+            ).fetchone()
+        return self._read_frame(row[0]) if row else None
+
+    # Compliance results
+
+    def save_compliance_results(self, tender_hash: str, matrix_hash: str, df: pd.DataFrame, version: str = "") -> None:
+        path = self._blob_path("compliance", f"{tender_hash}_{matrix_hash}.json")
+        self._write_frame(path, df)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "DELETE FROM compliance_results WHERE tender_hash = ? AND matrix_hash = ?", (tender_hash, matrix_hash)
+            )
+            conn.execute(
+                "INSERT INTO compliance_results (tender_hash, matrix_hash, version, blob_path, created_at) VALUES (?, ?, ?, ?, ?)",
+                (tender_hash, matrix_hash, version, path, self._now())
+            )
+
+    def get_compliance_results(self, tender_hash: str, matrix_hash: str, version: str = "") -> Optional[pd.DataFrame]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT blob_path FROM compliance_results WHERE tender_hash = ? AND matrix_hash = ? AND version = ?",
+                (tender_hash, matrix_hash, version)
+            ).fetchone()
+        return self._read_frame(row[0]) if row else None
+
+    # Compliance batch checkpoints
+
+    def save_compliance_batch(self, tender_hash: str, matrix_hash: str, batch_index: int,
+                              clause_ids: List[str], df: pd.DataFrame) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO compliance_batches (tender_hash, matrix_hash, batch_index, clause_ids, results, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (tender_hash, matrix_hash, batch_index, json.dumps(clause_ids),
+                 df.to_json(orient="split", index=False), self._now())
+            )
+
+    def get_compliance_batches(self, tender_hash: str, matrix_hash: str) -> Dict[int, Dict]:
+        """batch_index -> {"clause_ids": [...], "results": DataFrame} for every checkpointed batch."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT batch_index, clause_ids, results FROM compliance_batches WHERE tender_hash = ? AND matrix_hash = ?",
+                (tender_hash, matrix_hash)
+            ).fetchall()
+        return {r[0]: {"clause_ids": json.loads(r[1]), "results": pd.read_json(StringIO(r[2]), orient="split", dtype=False)}
+                for r in rows}
+
+    def count_compliance_batches(self, tender_hash: str, matrix_hash: str) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM compliance_batches WHERE tender_hash = ? AND matrix_hash = ?", (tender_hash, matrix_hash)
+            ).fetchone()[0]
+
+    def clear_compliance_batches(self, tender_hash: str, matrix_hash: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM compliance_batches WHERE tender_hash = ? AND matrix_hash = ?", (tender_hash, matrix_hash))
+
+    # Q&A history
+
+    def append_qa_message(self, file_hash: str, role: str, content: str, sources: List[str] = None) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO qa_history (file_hash, role, content, sources, created_at) VALUES (?, ?, ?, ?, ?)",
+                (file_hash, role, content, json.dumps(sources) if sources else None, self._now())
+            )
+
+    def get_qa_history(self, file_hash: str) -> List[Dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT role, content, sources FROM qa_history WHERE file_hash = ? ORDER BY id", (file_hash,)
+            ).fetchall()
+        return [{"role": r[0], "content": r[1], "sources": json.loads(r[2]) if r[2] else None} for r in rows]
+
+    # Q&A answer cache
+
+    def save_qa_answer(self, file_hash: str, question: str, normalized: str, answer: str,
+                       sources: List[str] = None, origin: str = None) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO qa_answers (file_hash, normalized, question, answer, sources, origin, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(file_hash, normalized) DO UPDATE SET "
+                "question = excluded.question, answer = excluded.answer, sources = excluded.sources, "
+                "origin = excluded.origin, created_at = excluded.created_at",
+                (file_hash, normalized, question, answer, json.dumps(sources) if sources else None, origin, self._now())
+            )
+
+    def get_qa_answers(self, file_hash: str) -> List[Dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT question, normalized, answer, sources, origin FROM qa_answers WHERE file_hash = ? ORDER BY created_at",
+                (file_hash,)
+            ).fetchall()
+        return [{"question": r[0], "normalized": r[1], "answer": r[2], "sources": json.loads(r[3]) if r[3] else None,
+                 "origin": r[4]} for r in rows]
@@ -0,0 +1,73 @@
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict
+
+import pandas as pd
+
+EXPORT_CACHE_ENTRIES = int(os.getenv("EXCEL_EXPORT_CACHE_ENTRIES", "16"))
+
+_export_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_export_cache_lock = threading.Lock()
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame's columns and values (the index is ignored)."""
+    digest = hashlib.sha256("\x1f".join(map(str, df.columns)).encode())
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    except TypeError:
+        # Unhashable cell values (lists, dicts): fall back to the JSON form
+        digest.update(df.to_json(orient="values").encode())
+    return digest.hexdigest()
+
+
+def _cell(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if hasattr(value, "item"):
+        # numpy scalars
+        return value.item()
+    return value
+
+
+def write_workbook(sheets: Dict[str, pd.DataFrame]) -> bytes:
+    """
+    Write sheet name -> DataFrame to .xlsx bytes with xlsxwriter in constant_memory
+    mode: rows are streamed out one at a time instead of held as cell objects.
+    """
+    import xlsxwriter
+
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    header_format = workbook.add_format({"bold": True})
+    for sheet_name, df in sheets.items():
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, [str(column) for column in df.columns], header_format)
+        for row_number, values in enumerate(df.itertuples(index=False, name=None), start=1):
+            worksheet.write_row(row_number, 0, [_cell(value) for value in values])
+    workbook.close()
+    return output.getvalue()
+
+
+def cached_workbook(sheets: Dict[str, pd.DataFrame]) -> bytes:
+    """write_workbook, memoised by sheet names and frame content so reruns without edits reuse the bytes."""
+    key = hashlib.sha256("|".join(f"{name}:{frame_hash(df)}" for name, df in sheets.items()).encode()).hexdigest()
+    with _export_cache_lock:
+        if key in _export_cache:
+            _export_cache.move_to_end(key)
+            return _export_cache[key]
+
+    workbook_bytes = write_workbook(sheets)
+    with _export_cache_lock:
+        _export_cache[key] = workbook_bytes
+        while len(_export_cache) > EXPORT_CACHE_ENTRIES:
+            _export_cache.popitem(last=False)
+    return workbook_bytes
@@ -17,7 +17,8 @@ def process_file(file_path: str, is_pdf: bool) -> str:
     
     if is_pdf:
         pdf_markdown = PDFMarkdown(file_path)
-        content = pdf_markdown.pdf_to_markdown()
+        with open(file_path, 'rb') as file:
+            content = pdf_markdown.pdf_to_markdown(file.read())
     else:
         with open(file_path, 'r', encoding='utf-8') as file:
             content = file.read()
@@ -1,23 +1,127 @@
 import os
+import threading
+import time
 from anthropic import Anthropic
 from dotenv import load_dotenv
+from utils.cancellation import JobCancelled, check_cancelled
+
+
+class RateLimiter:
+    """
+    Limits LLM calls shared across threads: at most requests_per_minute calls
+    started per rolling minute, and at most max_concurrent calls in flight.
+    """
+
+    def __init__(self, requests_per_minute=None, max_concurrent=None):
+        self.requests_per_minute = requests_per_minute or int(os.getenv("ANTHROPIC_REQUESTS_PER_MINUTE", "50"))
+        self.max_concurrent = max_concurrent or int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "8"))
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self._interval = 60.0 / self.requests_per_minute
+        self._next_slot = time.monotonic()
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._interval
+        if wait > 0:
+            time.sleep(wait)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+        return False
+
 
 class LLMClient:
-    def __init__(self, anthropic_model=None):
+    def __init__(self, anthropic_model=None, rate_limiter=None, fast_model=None):
         load_dotenv()
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
         self.default_model = anthropic_model or os.getenv("ANTHROPIC_MODEL")
+        self.fast_model = fast_model or os.getenv("ANTHROPIC_FAST_MODEL")
         self.client = Anthropic(api_key=self.api_key)
+        self.rate_limiter = rate_limiter
+        self._stats_lock = threading.Lock()
+        self.tier_stats = {tier: {"calls": 0, "failures": 0, "escalations": 0, "seconds": 0.0} for tier in ("fast", "strong")}
+
+    def call_llm_tiered(self, system_prompt, user_prompt, accept=None, max_tokens=1024, tier=None, cancel_token=None):
+        """
+        Ask the fast model first (ANTHROPIC_FAST_MODEL) and only fall back to the
+        default model when the fast answer is missing or accept(response) is False.
+        tier="strong" skips the fast model. Returns (response, tier_used).
+        Without a distinct fast model this is a plain call_llm on the default model.
+        """
+        if tier != "strong" and self.fast_model and self.fast_model != self.default_model:
+            response = self._timed_call("fast", system_prompt, user_prompt, self.fast_model, max_tokens, cancel_token)
+            if response is not None and (accept is None or accept(response)):
+                return response, "fast"
+            with self._stats_lock:
+                self.tier_stats["fast"]["escalations"] += 1
+        return self._timed_call("strong", system_prompt, user_prompt, None, max_tokens, cancel_token), "strong"
+
+    def _timed_call(self, tier, system_prompt, user_prompt, model, max_tokens, cancel_token=None):
+        started = time.perf_counter()
+        response = self.call_llm(system_prompt, user_prompt, model=model, max_tokens=max_tokens, cancel_token=cancel_token)
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            stats = self.tier_stats[tier]
+            stats["calls"] += 1
+            stats["seconds"] += elapsed
+            if response is None:
+                stats["failures"] += 1
+        return response
 
-    def call_llm(self, system_prompt, user_prompt, model=None, max_tokens=1024):
+    def tier_summary(self):
+        """Per-tier call counts, escalations and mean latency, for logging and the UI."""
+        with self._stats_lock:
+            return {tier: {**stats, "mean_seconds": stats["seconds"] / stats["calls"] if stats["calls"] else 0.0}
+                    for tier, stats in self.tier_stats.items()}
+
+    def call_llm(self, system_prompt, user_prompt, model=None, max_tokens=1024, history=None, cancel_token=None):
+        """
+        Returns the response text, or None on API errors. With a cancel_token the
+        response is streamed and JobCancelled is raised (not swallowed) as soon as
+        the token is cancelled, abandoning the in-flight request.
+        """
         try:
-            response = self.client.messages.create(
-                max_tokens=max_tokens,
-                system=system_prompt,
-                messages=[{"role": "user", "content": user_prompt}],
-                model=model or self.default_model,
-            )
-            return response.content[0].text
+            check_cancelled(cancel_token, "before LLM call")
+            if self.rate_limiter is not None:
+                with self.rate_limiter:
+                    check_cancelled(cancel_token, "before LLM call")
+                    return self._create(system_prompt, user_prompt, model, max_tokens, history, cancel_token)
+            return self._create(system_prompt, user_prompt, model, max_tokens, history, cancel_token)
+        except JobCancelled:
+            raise
         except Exception as e:
             print(f"An error occurred while calling the LLM: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def _create(self, system_prompt, user_prompt, model, max_tokens, history, cancel_token=None):
+        request = dict(
+            max_tokens=max_tokens,
+            system=system_prompt,
+            messages=[*(history or []), {"role": "user", "content": user_prompt}],
+            model=model or self.default_model,
+        )
+        if cancel_token is None:
+            response = self.client.messages.create(**request)
+            return response.content[0].text
+
+        # Leaving the stream context closes the connection, which aborts the request
+        parts = []
+        with self.client.messages.stream(**request) as stream:
+            for text in stream.text_stream:
+                cancel_token.check("during LLM call")
+                parts.append(text)
+        return "".join(parts)
+
+
+def make_llm_client(**kwargs) -> LLMClient:
+    """LLMClient for the configured backend: LLM_BACKEND=stub gives the local StubLLMClient used by load tests."""
+    load_dotenv()
+    if os.getenv("LLM_BACKEND", "anthropic") == "stub":
+        from utils.stub_llm import StubLLMClient
+        return StubLLMClient(**kwargs)
+    return LLMClient(**kwargs)
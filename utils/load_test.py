@@ -0,0 +1,289 @@
+"""
+Multi-user load test of the Streamlit demo with a stubbed LLM backend.
+
+Simulated sessions are driven through the SOTR, Tender Q&A and Compliance tabs
+with Streamlit's app-testing API. AppTest swaps Streamlit's global Runtime for
+every script run, so concurrent AppTests in one process would race on it:
+each worker process therefore runs one session at a time, and concurrency is
+the number of worker processes. Workers are reused across sessions, so each
+behaves like a server replica with its own model pool, caches and single-flight
+conversions; the document store on disk is shared by all of them. The LLM is
+replaced by StubLLMClient with configurable latency and error rate; PDF
+conversion is real.
+
+    python -m utils.load_test --sessions 20 --concurrency 5 --latency-ms 1500 --error-rate 0.05
+
+Reports throughput, per-step latency percentiles, queueing delay and peak RSS.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "demo.py")
+TABS = ("sotr", "qa", "compliance")
+DEFAULT_QUESTION = "What is the delivery period for the supplied items?"
+COMPLIANCE_BUTTONS = ("Run Compliance Check", "Resume Compliance Check")
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(share * len(ordered)) - 1))]
+
+
+def write_default_fixtures(fixture_dir: str) -> None:
+    """A one-page tender PDF and a matching three-clause SOTR matrix."""
+    import pandas as pd
+    from utils.excel_io import write_workbook
+    from utils.model_warmup import build_warmup_pdf
+
+    with open(os.path.join(fixture_dir, "tender.pdf"), "wb") as f:
+        f.write(build_warmup_pdf())
+    matrix = pd.DataFrame([[1, "The supplier shall deliver all items within 30 days of the order.", "1"],
+                           [2, "The supplier shall provide 24/7 support.", "1"],
+                           [3, "Delivery shall include installation at site.", "Scope of Work"]],
+                          columns=["Sr. No.", "Clause", "Clause Reference"])
+    with open(os.path.join(fixture_dir, "sotr_matrix.xlsx"), "wb") as f:
+        f.write(write_workbook({"Sheet1": matrix}))
+
+
+class RSSSampler:
+    """Samples this process's RSS on a background thread while the test runs."""
+
+    def __init__(self, interval: float = 0.2) -> None:
+        from utils.marker_models import current_rss_mb
+        self.current_rss_mb = current_rss_mb
+        self.interval = interval
+        self.start_mb = current_rss_mb()
+        self.peak_mb = self.start_mb
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, self.current_rss_mb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self.current_rss_mb())
+        return False
+
+
+class SimulatedSession:
+    """One AppTest session clicking through the selected tabs, timing every script run."""
+
+    def __init__(self, session_no: int, tabs: List[str], pdf_name: str, matrix_name: str, question: str,
+                 timeout: float) -> None:
+        self.session_no = session_no
+        self.tabs = tabs
+        self.pdf_name = pdf_name
+        self.matrix_name = matrix_name
+        self.question = question
+        self.timeout = timeout
+        self.steps: List[Dict] = []
+        self.queue_delay = 0.0
+        self.ok = True
+        self.pid = None
+        self.rss_mb = {}
+        self.conversion_flights = {}
+
+    def step(self, name: str, action) -> bool:
+        started = time.perf_counter()
+        error = None
+        try:
+            at = action()
+            problems = [element.value for element in at.exception] + [element.value for element in at.error]
+            if problems:
+                error = str(problems[0])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.steps.append({"step": name, "seconds": time.perf_counter() - started, "error": error})
+        if error is not None:
+            self.ok = False
+            print(f"Session {self.session_no}: {name} failed: {error}")
+        return error is None
+
+    def run(self, arrived: float) -> "SimulatedSession":
+        """Run in a worker process; arrived is the wall-clock time the session was submitted."""
+        from utils.single_flight import conversion_flights
+
+        self.queue_delay = time.time() - arrived
+        self.pid = os.getpid()
+        with RSSSampler() as rss:
+            self._run_tabs()
+        self.rss_mb = {"start": rss.start_mb, "peak": rss.peak_mb}
+        self.conversion_flights = conversion_flights.metrics()
+        return self
+
+    def _run_tabs(self) -> None:
+        from streamlit.testing.v1 import AppTest
+
+        try:
+            at = AppTest.from_file(APP_PATH, default_timeout=self.timeout)
+            if not self.step("load", at.run):
+                return
+            if "sotr" in self.tabs:
+                self.step("sotr", lambda: at.selectbox(key="sotr_pdf_uploader").select(self.pdf_name).run())
+            if "qa" in self.tabs:
+                if self.step("qa.index", lambda: at.selectbox(key="tender_qa_pdf_uploader").select(self.pdf_name).run()):
+                    self.step("qa.ask", lambda: at.chat_input[0].set_value(self.question).run())
+            if "compliance" in self.tabs:
+                at.selectbox(key="compliance_check_matrix_uploader").select(self.matrix_name)
+                if self.step("compliance.load", lambda: at.selectbox(key="compliance_check_tender_pdf_uploader").select(self.pdf_name).run()):
+                    self.step("compliance", lambda: next(button for button in at.button
+                                                         if button.label in COMPLIANCE_BUTTONS).click().run())
+        except Exception:
+            self.ok = False
+            print(f"Session {self.session_no} aborted: {traceback.format_exc()}")
+
+
+def run_session(session: SimulatedSession, arrived: float) -> SimulatedSession:
+    return session.run(arrived)
+
+
+def run_load_test(sessions: int, concurrency: int, tabs: List[str], fixture_dir: str, arrival_interval: float = 0.0,
+                  timeout: float = 600, question: str = DEFAULT_QUESTION) -> Dict:
+    """
+    Start a session every arrival_interval seconds on a pool of concurrency worker
+    processes (one session per process at a time); sessions cycle through the
+    fixture PDFs. The queueing delay is the time a session waited for a free
+    worker after it arrived. Peak RSS is per worker process.
+    """
+    pdfs = sorted(name for name in os.listdir(fixture_dir) if name.lower().endswith(".pdf"))
+    matrices = sorted(name for name in os.listdir(fixture_dir) if name.lower().endswith(".xlsx"))
+    if not pdfs or ("compliance" in tabs and not matrices):
+        raise Exception(f"Fixture directory {fixture_dir} needs PDF files (and an .xlsx matrix for the compliance tab)")
+
+    simulated = [SimulatedSession(i, tabs, pdfs[i % len(pdfs)], matrices[i % len(matrices)] if matrices else None,
+                                  question, timeout) for i in range(sessions)]
+    started = time.time()
+    # spawn: workers must not inherit this process's threads or Streamlit state
+    with ProcessPoolExecutor(max_workers=concurrency, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = []
+        for i, session in enumerate(simulated):
+            time.sleep(max(0.0, started + i * arrival_interval - time.time()))
+            futures.append(pool.submit(run_session, session, time.time()))
+        simulated = [future.result() for future in futures]
+    wall_seconds = time.time() - started
+
+    # Counters are cumulative per worker process: keep each worker's latest and add them up
+    worker_flights = {}
+    for session in simulated:
+        if session.pid is not None:
+            latest = worker_flights.get(session.pid)
+            if latest is None or session.conversion_flights["runs"] + session.conversion_flights["shared"] >= \
+                    latest["runs"] + latest["shared"]:
+                worker_flights[session.pid] = session.conversion_flights
+    flights = {key: sum(metrics[key] for metrics in worker_flights.values()) for key in ("runs", "shared", "wait_seconds")}
+    peaks = [session.rss_mb["peak"] for session in simulated if session.rss_mb]
+
+    steps: Dict[str, Dict] = {}
+    for session in simulated:
+        for step in session.steps:
+            entry = steps.setdefault(step["step"], {"seconds": [], "errors": 0})
+            entry["seconds"].append(step["seconds"])
+            entry["errors"] += step["error"] is not None
+    completed = sum(session.ok for session in simulated)
+    queue_delays = [session.queue_delay for session in simulated]
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "tabs": list(tabs),
+        "completed": completed,
+        "failed": sessions - completed,
+        "wall_seconds": round(wall_seconds, 2),
+        "sessions_per_minute": round(60 * completed / wall_seconds, 2),
+        "steps_per_minute": round(60 * sum(len(s["seconds"]) - s["errors"] for s in steps.values()) / wall_seconds, 2),
+        "queue_delay": {"p50": round(percentile(queue_delays, 0.5), 2), "p95": round(percentile(queue_delays, 0.95), 2),
+                        "max": round(max(queue_delays, default=0.0), 2)},
+        "steps": {name: {"count": len(entry["seconds"]), "errors": entry["errors"],
+                         **{f"p{int(share * 100)}": round(percentile(entry["seconds"], share), 2)
+                            for share in (0.5, 0.9, 0.95, 0.99)},
+                         "max": round(max(entry["seconds"]), 2)}
+                  for name, entry in steps.items()},
+        "workers": len(worker_flights),
+        "rss_mb": {"start": round(min((session.rss_mb["start"] for session in simulated if session.rss_mb), default=0.0), 1),
+                   "peak_p50": round(percentile(peaks, 0.5), 1), "peak": round(max(peaks, default=0.0), 1)},
+        "conversion_flights": flights,
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(f"\nLoad test: {report['sessions']} sessions on {report['workers']} worker processes "
+          f"(concurrency {report['concurrency']}), tabs {','.join(report['tabs'])}")
+    print(f"Completed {report['completed']}, failed {report['failed']} in {report['wall_seconds']:.1f}s: "
+          f"{report['sessions_per_minute']:.2f} sessions/min, {report['steps_per_minute']:.2f} steps/min")
+    delay = report["queue_delay"]
+    print(f"Queueing delay: p50 {delay['p50']:.2f}s, p95 {delay['p95']:.2f}s, max {delay['max']:.2f}s")
+    rss = report["rss_mb"]
+    print(f"RSS per worker: {rss['start']:.0f} MB at start, peak p50 {rss['peak_p50']:.0f} MB, max {rss['peak']:.0f} MB")
+    flights = report["conversion_flights"]
+    print(f"Conversions: {flights['runs']} run, {flights['shared']} shared, {flights['wait_seconds']:.1f}s waited on shared runs")
+    print(f"\n{'step':<18} {'count':>6} {'errors':>6} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for name, step in report["steps"].items():
+        print(f"{name:<18} {step['count']:>6} {step['errors']:>6} " +
+              " ".join(f"{step[key]:>7.2f}s" for key in ("p50", "p90", "p95", "p99", "max")))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Multi-user load test of the demo app with a stubbed LLM.")
+    parser.add_argument("--sessions", type=int, default=10, help="simulated sessions in total")
+    parser.add_argument("--concurrency", type=int, default=4, help="worker processes, each running one session at a time")
+    parser.add_argument("--arrival-interval", type=float, default=0.0, help="seconds between session arrivals")
+    parser.add_argument("--tabs", default=",".join(TABS), help=f"comma-separated subset of {','.join(TABS)}")
+    parser.add_argument("--fixtures", help="directory of fixture PDFs and .xlsx matrices (default: a generated one-page tender)")
+    parser.add_argument("--store-dir", help="document store directory (default: a fresh temporary one, so nothing is cached)")
+    parser.add_argument("--latency-ms", type=float, help="mean stubbed LLM latency (LLM_STUB_LATENCY_MS)")
+    parser.add_argument("--error-rate", type=float, help="share of stubbed LLM calls that fail (LLM_STUB_ERROR_RATE)")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds allowed for one script run")
+    parser.add_argument("--question", default=DEFAULT_QUESTION, help="question asked in the Q&A tab")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    tabs = [tab.strip() for tab in args.tabs.split(",") if tab.strip()]
+    unknown = set(tabs) - set(TABS)
+    if unknown:
+        parser.error(f"unknown tabs: {', '.join(sorted(unknown))}")
+
+    fixture_dir = args.fixtures
+    if fixture_dir is None:
+        fixture_dir = tempfile.mkdtemp(prefix="tender_fixtures_")
+        write_default_fixtures(fixture_dir)
+    # Read when the app and the stub are first imported, so set before any session starts
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["TENDER_FIXTURE_DIR"] = os.path.abspath(fixture_dir)
+    os.environ["TENDER_STORE_DIR"] = args.store_dir or tempfile.mkdtemp(prefix="tender_store_")
+    if args.latency_ms is not None:
+        os.environ["LLM_STUB_LATENCY_MS"] = str(args.latency_ms)
+    if args.error_rate is not None:
+        os.environ["LLM_STUB_ERROR_RATE"] = str(args.error_rate)
+
+    report = run_load_test(args.sessions, args.concurrency, tabs, fixture_dir, args.arrival_interval, args.timeout,
+                           args.question)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    # Run through the importable module: sessions and results are pickled to the worker
+    # processes, where AppTest runs demo.py as __main__
+    from utils.load_test import main
+    main()
@@ -0,0 +1,148 @@
+import re
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+
+HEADER_PATTERN = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$", re.MULTILINE)
+FENCE_PATTERN = re.compile(r"^[ \t]*(```|~~~)", re.MULTILINE)
+PAGE_BREAK_PATTERN = re.compile(r"^(?:\{(\d+)\})?-{16,}[ \t]*$", re.MULTILINE)
+SECTION_NO_PATTERN = re.compile(r"^\**(\d+(?:\.\d+)*)\.?(?=\s|$)")
+
+
+class MarkdownSection:
+    """
+    One header-delimited section of a Markdown buffer.
+
+    Only offsets are stored: start is the header line, content_start the first
+    character after it, end the start of the next section. Use text() to slice
+    the content out of the original buffer when it is needed.
+    """
+
+    __slots__ = ("headers", "section_no", "start", "content_start", "end", "page_start", "page_end")
+
+    def __init__(self, headers: Tuple[Tuple[int, str], ...], section_no: str, start: int, content_start: int,
+                 end: int, page_start: Optional[int] = None, page_end: Optional[int] = None) -> None:
+        self.headers = headers
+        self.section_no = section_no
+        self.start = start
+        self.content_start = content_start
+        self.end = end
+        self.page_start = page_start
+        self.page_end = page_end
+
+    @property
+    def title(self) -> str:
+        return self.headers[-1][1] if self.headers else ""
+
+    @property
+    def header_path(self) -> str:
+        return " > ".join(title for _, title in self.headers)
+
+    @property
+    def metadata(self) -> Dict[str, str]:
+        return {f"Header {level}": title for level, title in self.headers}
+
+    def text(self, markdown_text: str) -> str:
+        return markdown_text[self.content_start:self.end]
+
+    def __repr__(self) -> str:
+        return (f"MarkdownSection(section_no={self.section_no!r}, title={self.title!r}, "
+                f"start={self.start}, end={self.end}, pages={self.page_start}-{self.page_end})")
+
+
+class MarkdownChunk:
+    """Drop-in for the langchain Document objects split_markdown_by_headers used to return."""
+
+    __slots__ = ("page_content", "metadata")
+
+    def __init__(self, page_content: str, metadata: Dict[str, str]) -> None:
+        self.page_content = page_content
+        self.metadata = metadata
+
+    def __repr__(self) -> str:
+        return f"MarkdownChunk(metadata={self.metadata!r}, page_content={self.page_content[:60]!r})"
+
+
+def _fenced_ranges(markdown_text: str) -> List[Tuple[int, int]]:
+    fences = [m.start() for m in FENCE_PATTERN.finditer(markdown_text)]
+    return [(fences[i], fences[i + 1]) for i in range(0, len(fences) - 1, 2)]
+
+
+def _page_breaks(markdown_text: str) -> Tuple[List[int], List[int]]:
+    offsets = []
+    pages = []
+    for count, match in enumerate(PAGE_BREAK_PATTERN.finditer(markdown_text), start=1):
+        offsets.append(match.start())
+        pages.append(int(match.group(1)) if match.group(1) else count)
+    return offsets, pages
+
+
+def section_number(headers: Tuple[Tuple[int, str], ...]) -> str:
+    """Number of the deepest numbered header, else the first word of the H2 (as before), else ""."""
+    for _, title in reversed(headers):
+        match = SECTION_NO_PATTERN.match(title)
+        if match:
+            return match.group(1)
+    for level, title in headers:
+        if level == 2:
+            return title.split(" ")[0]
+    return ""
+
+
+def iter_sections(markdown_text: str, max_level: int = 3,
+                  open_headers: Tuple[Tuple[int, str], ...] = ()) -> Iterator[MarkdownSection]:
+    """
+    Single pass over the Markdown yielding a MarkdownSection per header of level
+    <= max_level (plus a leading section for any text before the first header).
+    Headers inside fenced code blocks are ignored. Page numbers are filled in when
+    the Markdown carries marker's page separators. open_headers are the headers
+    still open where markdown_text starts, when it is a piece of a larger document.
+    """
+    fenced = _fenced_ranges(markdown_text)
+    fence_starts = [start for start, _ in fenced]
+    break_offsets, break_pages = _page_breaks(markdown_text)
+
+    def page_at(offset: int) -> Optional[int]:
+        if not break_offsets:
+            return None
+        idx = bisect_right(break_offsets, offset)
+        if idx == 0:
+            return break_pages[0] - 1 if break_pages[0] > 1 else 0
+        return break_pages[idx - 1]
+
+    stack: List[Tuple[int, str]] = list(open_headers)
+    start = 0
+    content_start = 0
+    headers: Tuple[Tuple[int, str], ...] = tuple(open_headers)
+
+    for match in HEADER_PATTERN.finditer(markdown_text):
+        level = len(match.group(1))
+        if level > max_level:
+            continue
+        idx = bisect_right(fence_starts, match.start()) - 1
+        if idx >= 0 and fenced[idx][0] <= match.start() < fenced[idx][1]:
+            continue
+
+        if match.start() > content_start or headers:
+            yield MarkdownSection(headers, section_number(headers), start, content_start, match.start(),
+                                  page_at(start), page_at(max(start, match.start() - 1)))
+
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, match.group(2).strip()))
+        headers = tuple(stack)
+        start = match.start()
+        content_start = min(match.end() + 1, len(markdown_text))
+
+    if len(markdown_text) > content_start or headers:
+        yield MarkdownSection(headers, section_number(headers), start, content_start, len(markdown_text),
+                              page_at(start), page_at(max(start, len(markdown_text) - 1)))
+
+
+def split_markdown_by_headers(markdown_text: str, max_level: int = 3) -> List[MarkdownChunk]:
+    """Non-empty sections as MarkdownChunk(page_content, metadata), like langchain's MarkdownHeaderTextSplitter."""
+    chunks = []
+    for section in iter_sections(markdown_text, max_level):
+        content = section.text(markdown_text).strip()
+        if content:
+            chunks.append(MarkdownChunk(content, section.metadata))
+    return chunks
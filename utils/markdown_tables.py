@@ -0,0 +1,71 @@
+import re
+from typing import List, Tuple
+
+SEPARATOR_ROW_PATTERN = re.compile(r"^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?$")
+
+
+def parse_table_row(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    cells = re.split(r"(?<!\\)\|", line)
+    return [cell.replace("\\|", "/").replace("<br>", " ").strip() for cell in cells]
+
+
+def split_tables(markdown_text: str) -> List[Tuple[str, object]]:
+    """
+    Split Markdown into ("text", str) and ("table", (header, rows)) segments.
+    Tables are pipe tables as written by marker's format_tables: a header row,
+    a --- separator row, then body rows.
+    """
+    segments = []
+    text_lines = []
+    lines = markdown_text.split("\n")
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if line.startswith("|") and i + 1 < len(lines) and SEPARATOR_ROW_PATTERN.match(lines[i + 1].strip()):
+            if text_lines:
+                segments.append(("text", "\n".join(text_lines)))
+                text_lines = []
+            header = parse_table_row(line)
+            rows = []
+            i += 2
+            while i < len(lines) and lines[i].strip().startswith("|"):
+                rows.append(parse_table_row(lines[i]))
+                i += 1
+            segments.append(("table", (header, rows)))
+            continue
+        text_lines.append(lines[i])
+        i += 1
+    if text_lines:
+        segments.append(("text", "\n".join(text_lines)))
+    return segments
+
+
+def table_to_points(header: List[str], rows: List[List[str]], section: str) -> List[str]:
+    """
+    Turn each table row into a matrix line "Sr. No.|Clause|Clause Reference".
+    Cells are kept verbatim and labelled with their column header; every row of
+    a table carries the section number as its reference.
+    """
+    points = []
+    for row in rows:
+        if not any(row) or row == header:
+            continue
+        parts = []
+        for column, value in enumerate(row):
+            if not value:
+                continue
+            label = header[column] if column < len(header) else ""
+            parts.append(f"{label}: {value}" if label else value)
+        clause = "; ".join(parts).replace("|", "/").replace('"', "")
+        points.append(f"{len(points) + 1}|{clause}|{section}")
+    return points
+
+
+def has_free_text(text: str) -> bool:
+    """True when a text segment holds more than headers and whitespace."""
+    return any(line.strip() and not line.lstrip().startswith("#") for line in text.split("\n"))
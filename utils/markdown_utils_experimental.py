@@ -13,11 +13,9 @@ from marker.layout.layout import surya_layout, annotate_block_types
 from marker.layout.order import surya_order, sort_blocks_in_reading_order
 from marker.ocr.lang import replace_langs_with_codes, validate_langs
 from marker.ocr.detection import surya_detection
-from marker.ocr.recognition import run_ocr
 from marker.pdf.extract_text import get_text_blocks
 from marker.cleaners.headers import filter_header_footer, filter_common_titles
 from marker.equations.equations import replace_equations
-from marker.pdf.utils import find_filetype
 from marker.postprocessors.editor import edit_full_text
 from marker.cleaners.code import identify_code_blocks, indent_blocks
 from marker.cleaners.bullets import replace_bullets
@@ -27,17 +25,15 @@ from marker.postprocessors.markdown import merge_spans, merge_lines, get_full_te
 from marker.cleaners.text import cleanup_text
 from marker.images.extract import extract_images
 from marker.images.save import images_to_dict
-from marker.models import load_all_models
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Union
 from marker.settings import settings
-from langchain.text_splitter import MarkdownHeaderTextSplitter
-from functools import lru_cache
-import tempfile
-import time
-
-@lru_cache(maxsize=1)
-def get_marker_models():
-    return load_all_models()
+from utils.marker_models import get_marker_models, as_model_pool, convert_pdf_windowed, as_pdf_source, find_source_filetype
+from utils.cpu_inference import default_batch_multiplier
+from utils.page_cache import PageImageCache
+from utils.ocr_languages import run_ocr_routed
+from utils.cancellation import check_cancelled
+from utils.profiling import profile_stage
+from utils import markdown_sections
 
 class PDFMarkdown:
     def __init__(self, pdf_path=None, file_id=None):
@@ -45,37 +41,31 @@ class PDFMarkdown:
         self.markdown_text = None
         self.markdown_file_path = None
         self.file_id = file_id
+        self.out_meta = None
 
-    def pdf_to_markdown(self, file_content, progress_callback=None):
+    def pdf_to_markdown(self, file_content, progress_callback=None, cancel_token=None):
         """Convert PDF content to Markdown using marker-pdf library."""
         model_lst = get_marker_models()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            temp_file.write(file_content)
-            temp_file_path = temp_file.name
-
-        try:
-            full_text, doc_images, out_meta = self.convert_single_pdf(
-                fname=temp_file_path,
-                model_lst=model_lst,
-                batch_multiplier=3,
-                progress_callback=progress_callback
-            )
-            self.markdown_text = full_text
-            if progress_callback:
-                progress_callback(1.0, "Conversion complete")
-            return self.markdown_text
-        finally:
-            temp_file.close()            
-            time.sleep(0.1)           
-            try:
-                os.unlink(temp_file_path)
-            except PermissionError:
-                print(f"Could not delete temporary file: {temp_file_path}")
-
-    def convert_single_pdf(self, fname: str, model_lst: List, max_pages: int = None,
+        full_text, doc_images, out_meta = convert_pdf_windowed(
+            self.convert_single_pdf,
+            as_pdf_source(file_content),
+            model_lst=model_lst,
+            file_id=self.file_id,
+            batch_multiplier=default_batch_multiplier(),
+            progress_callback=progress_callback,
+            cancel_token=cancel_token
+        )
+        self.markdown_text = full_text
+        self.out_meta = out_meta
+        if progress_callback:
+            progress_callback(1.0, "Conversion complete")
+        return self.markdown_text
+
+    def convert_single_pdf(self, fname: Union[str, bytes], model_lst: List, max_pages: int = None,
                            start_page: int = None, metadata: Optional[Dict] = None,
                            langs: Optional[List[str]] = None, batch_multiplier: int = 1,
-                           ocr_all_pages: bool = False, progress_callback=None) -> Tuple[str, Dict[str, Image.Image], Dict]:
+                           ocr_all_pages: bool = False, progress_callback=None,
+                           extract_figures: bool = True, cancel_token=None) -> Tuple[str, Dict[str, Image.Image], Dict]:
         total_steps = 11
         current_step = 0
 
@@ -91,7 +81,8 @@ class PDFMarkdown:
         langs = replace_langs_with_codes(langs)
         validate_langs(langs)
 
-        filetype = find_filetype(fname)
+        source_name = fname if isinstance(fname, str) else (self.file_id or "document")
+        filetype = find_source_filetype(fname)
         out_meta = {"languages": langs, "filetype": filetype}
         if filetype == "other":
             return "", {}, out_meta
@@ -106,32 +97,52 @@ class PDFMarkdown:
             for page_idx in range(start_page):
                 doc.del_page(0)
 
-        texify_model, layout_model, order_model, edit_model, detection_model, ocr_model = model_lst
+        models = as_model_pool(model_lst)
 
-        surya_detection(doc, pages, detection_model, batch_multiplier=batch_multiplier)
+        # Pages are rendered once per DPI and shared by every stage below
+        page_cache = PageImageCache(cancel_token=cancel_token)
+        doc = page_cache.wrap(doc)
+
+        check_cancelled(cancel_token, "detection")
+
+        with models.use("detection") as detection_model, page_cache.stage("detection"), profile_stage("detection"):
+            surya_detection(doc, pages, detection_model, batch_multiplier=batch_multiplier)
         flush_cuda_memory()
         update_progress("Detected text lines")
 
-        pages, ocr_stats = run_ocr(doc, pages, langs, ocr_model, batch_multiplier=batch_multiplier, ocr_all_pages=ocr_all_pages)
+        check_cancelled(cancel_token, "ocr")
+
+        with models.use("ocr") as ocr_model, page_cache.stage("ocr"), profile_stage("ocr"):
+            pages, ocr_stats, language_stats = run_ocr_routed(doc, pages, langs, ocr_model, batch_multiplier=batch_multiplier,
+                                                              ocr_all_pages=ocr_all_pages, first_page=start_page or 0)
         flush_cuda_memory()
         update_progress("Performed OCR")
 
         out_meta["ocr_stats"] = ocr_stats
+        out_meta["ocr_languages"] = language_stats
         if len([b for p in pages for b in p.blocks]) == 0:
-            print(f"Could not extract any text blocks for {fname}")
+            print(f"Could not extract any text blocks for {source_name}")
+            out_meta["page_cache"] = page_cache.stats()
+            page_cache.close()
             return "", {}, out_meta
 
-        surya_layout(doc, pages, layout_model, batch_multiplier=batch_multiplier)
+        check_cancelled(cancel_token, "layout")
+
+        with models.use("layout") as layout_model, page_cache.stage("layout"), profile_stage("layout"):
+            surya_layout(doc, pages, layout_model, batch_multiplier=batch_multiplier)
         flush_cuda_memory()
         update_progress("Analyzed layout")
 
         bad_span_ids = filter_header_footer(pages)
         out_meta["block_stats"] = {"header_footer": len(bad_span_ids)}
         annotate_block_types(pages)
-        dump_bbox_debug_data(doc, fname, pages)
+        dump_bbox_debug_data(doc, source_name, pages)
         update_progress("Filtered headers and footers")
 
-        surya_order(doc, pages, order_model, batch_multiplier=batch_multiplier)
+        check_cancelled(cancel_token, "order")
+
+        with models.use("order") as order_model, page_cache.stage("order"), profile_stage("order"):
+            surya_order(doc, pages, order_model, batch_multiplier=batch_multiplier)
         sort_blocks_in_reading_order(pages)
         flush_cuda_memory()
         update_progress("Determined reading order")
@@ -149,13 +160,18 @@ class PDFMarkdown:
                 block.filter_spans(bad_span_ids)
                 block.filter_bad_span_types()
 
-        filtered, eq_stats = replace_equations(doc, pages, texify_model, batch_multiplier=batch_multiplier)
+        check_cancelled(cancel_token, "texify")
+
+        with models.use("texify") as texify_model, page_cache.stage("texify"), profile_stage("texify"):
+            filtered, eq_stats = replace_equations(doc, pages, texify_model, batch_multiplier=batch_multiplier)
         flush_cuda_memory()
         out_meta["block_stats"]["equations"] = eq_stats
         update_progress("Processed equations")
 
-        if settings.EXTRACT_IMAGES:
-            extract_images(doc, pages)
+        if settings.EXTRACT_IMAGES and extract_figures:
+            check_cancelled(cancel_token, "images")
+            with page_cache.stage("images"), profile_stage("images"):
+                extract_images(doc, pages)
         update_progress("Extracted images")
 
         split_heading_blocks(pages)
@@ -168,9 +184,14 @@ class PDFMarkdown:
         full_text = replace_bullets(full_text)
         update_progress("Formatted text")
 
-        full_text, edit_stats = edit_full_text(full_text, edit_model, batch_multiplier=batch_multiplier)
+        check_cancelled(cancel_token, "edit")
+
+        with models.use("edit") as edit_model, profile_stage("edit"):
+            full_text, edit_stats = edit_full_text(full_text, edit_model, batch_multiplier=batch_multiplier)
         flush_cuda_memory()
         out_meta["postprocess_stats"] = {"edit": edit_stats}
+        out_meta["page_cache"] = page_cache.stats()
+        page_cache.close()
         doc_images = images_to_dict(pages)
         update_progress("Finalized document")
 
@@ -183,17 +204,18 @@ class PDFMarkdown:
             file.write(self.markdown_text)
         return self.markdown_file_path
 
-    def split_markdown_by_headers(self):
-        if self.markdown_text is None:
+    def split_markdown_by_headers(self, markdown_text=None):
+        markdown_text = markdown_text if markdown_text is not None else self.markdown_text
+        if markdown_text is None:
+            raise Exception("please convert to markdown first using pdf_to_markdown()")
+        return markdown_sections.split_markdown_by_headers(markdown_text)
+
+    def iter_sections(self, markdown_text=None, max_level=3, open_headers=()):
+        """Yield MarkdownSection records (header path, section number, offsets, pages) in one pass."""
+        markdown_text = markdown_text if markdown_text is not None else self.markdown_text
+        if markdown_text is None:
             raise Exception("please convert to markdown first using pdf_to_markdown()")
-        headers_to_split_on = [
-            ("#", "Header 1"),
-            ("##", "Header 2"),
-            ("###", "Header 3"),
-        ]
-        markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=headers_to_split_on)
-        md_header_splits = markdown_splitter.split_text(self.markdown_text)
-        return md_header_splits
+        return markdown_sections.iter_sections(markdown_text, max_level, open_headers)
 
     def get_file_id(self):
         return self.file_id
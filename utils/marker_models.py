@@ -0,0 +1,318 @@
+import gc
+import os
+import resource
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+from utils.cpu_inference import apply_thread_settings, load_kwargs, optimize_model, resolve_profile
+from utils.cancellation import check_cancelled
+
+MODEL_STAGES = ("texify", "layout", "order", "edit", "detection", "ocr")
+
+# Conversion memory settings. A budget of 0 keeps every model resident, as before.
+MEMORY_BUDGET_MB = int(os.getenv("MARKER_MEMORY_BUDGET_MB", "0"))
+PAGE_WINDOW = int(os.getenv("MARKER_PAGE_WINDOW", "8" if MEMORY_BUDGET_MB else "0"))
+IMAGE_MODE = os.getenv("MARKER_IMAGE_MODE", "memory")  # memory | disk | off
+IMAGE_SPILL_DIR = os.getenv("MARKER_IMAGE_DIR", os.path.join(tempfile.gettempdir(), "marker_images"))
+
+_monitor_state = threading.local()
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (falls back to the peak where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MemoryMonitor:
+    """Collects RSS samples at stage boundaries of a single conversion."""
+
+    def __init__(self) -> None:
+        self.samples = []
+        self.started_at = time.time()
+        self.start_rss_mb = current_rss_mb()
+        self.peak_sample_mb = self.start_rss_mb
+
+    def sample(self, label: str) -> None:
+        rss = current_rss_mb()
+        self.peak_sample_mb = max(self.peak_sample_mb, rss)
+        self.samples.append({"stage": label, "rss_mb": round(rss, 1), "elapsed_s": round(time.time() - self.started_at, 2)})
+
+    def report(self) -> Dict:
+        return {
+            "start_rss_mb": round(self.start_rss_mb, 1),
+            "peak_rss_mb": round(self.peak_sample_mb, 1),
+            "process_peak_rss_mb": round(peak_rss_mb(), 1),
+            "samples": self.samples,
+        }
+
+
+@contextmanager
+def memory_monitor():
+    monitor = MemoryMonitor()
+    previous = getattr(_monitor_state, "monitor", None)
+    _monitor_state.monitor = monitor
+    try:
+        yield monitor
+    finally:
+        _monitor_state.monitor = previous
+
+
+def sample_memory(label: str) -> None:
+    monitor = getattr(_monitor_state, "monitor", None)
+    if monitor is not None:
+        monitor.sample(label)
+
+
+def _load_stage_model(stage: str, profile: str = "fp32"):
+    from marker.models import (setup_detection_model, setup_layout_model,
+                               setup_order_model, setup_recognition_model, setup_texify_model)
+    from marker.postprocessors.editor import load_editing_model
+    loaders = {
+        "texify": setup_texify_model,
+        "layout": setup_layout_model,
+        "order": setup_order_model,
+        "edit": load_editing_model,
+        "detection": setup_detection_model,
+        "ocr": setup_recognition_model,
+    }
+    model = loaders[stage](**load_kwargs(profile))
+    return optimize_model(stage, model, profile)
+
+
+class MarkerModelPool:
+    """
+    Holds marker/surya models per pipeline stage.
+
+    Without a memory budget every model is loaded up front and stays resident.
+    With a budget, models are loaded when their stage first needs them, and idle
+    models are unloaded (least recently used first) when loading the next one would
+    exceed it. The check uses each model's size measured at load time on top of the
+    RSS before any model was loaded, not the current RSS: freed memory is often not
+    returned to the OS, and evicting on RSS alone would unload and reload models
+    after every page window.
+    Models are loaded with the CPU inference profile (see utils.cpu_inference).
+    """
+
+    def __init__(self, memory_budget_mb: int = 0, models: Optional[Dict] = None, profile: Optional[str] = None) -> None:
+        self.memory_budget_mb = memory_budget_mb
+        self.requested_profile = profile
+        self.profile = None
+        self.models = OrderedDict(models or {})
+        self.in_use = {stage: 0 for stage in MODEL_STAGES}
+        self.load_counts = {stage: 0 for stage in MODEL_STAGES}
+        # Largest RSS growth seen while loading each stage's model
+        self.model_mb = {stage: 0.0 for stage in MODEL_STAGES}
+        self.base_rss_mb = current_rss_mb()
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_list(cls, model_lst: List) -> "MarkerModelPool":
+        """Wrap a load_all_models() list; the models stay resident."""
+        return cls(models=dict(zip(MODEL_STAGES, model_lst)))
+
+    def load_all(self) -> "MarkerModelPool":
+        for stage in MODEL_STAGES:
+            self.get(stage)
+            self.release(stage)
+        return self
+
+    def get(self, stage: str):
+        with self._lock:
+            if stage not in self.models:
+                self._evict_idle(self.model_mb[stage])
+                if self.profile is None:
+                    self.profile = resolve_profile(self.requested_profile)
+                rss_before = current_rss_mb()
+                self.models[stage] = _load_stage_model(stage, self.profile)
+                self.model_mb[stage] = max(self.model_mb[stage], current_rss_mb() - rss_before)
+                self.load_counts[stage] += 1
+                sample_memory(f"load:{stage}")
+            self.models.move_to_end(stage)
+            self.in_use[stage] += 1
+            return self.models[stage]
+
+    @contextmanager
+    def use(self, stage: str):
+        model = self.get(stage)
+        try:
+            yield model
+        finally:
+            self.release(stage)
+
+    def release(self, stage: str) -> None:
+        with self._lock:
+            self.in_use[stage] = max(0, self.in_use[stage] - 1)
+            self._evict_idle()
+        sample_memory(stage)
+
+    def resident_mb(self) -> float:
+        """Estimated memory of the loaded models plus the process before any was loaded."""
+        return self.base_rss_mb + sum(self.model_mb[stage] for stage in self.models)
+
+    def _evict_idle(self, incoming_mb: float = 0.0) -> None:
+        if not self.memory_budget_mb:
+            return
+        for stage in list(self.models):
+            if self.resident_mb() + incoming_mb <= self.memory_budget_mb:
+                break
+            if self.in_use[stage] == 0:
+                self._unload(stage)
+
+    def _unload(self, stage: str) -> None:
+        del self.models[stage]
+        gc.collect()
+        from marker.utils import flush_cuda_memory
+        flush_cuda_memory()
+
+    def unload_all(self) -> None:
+        with self._lock:
+            for stage in list(self.models):
+                if self.in_use[stage] == 0:
+                    self._unload(stage)
+
+    def resident_stages(self) -> List[str]:
+        return list(self.models)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_marker_models() -> MarkerModelPool:
+    """Process-wide model pool shared by every PDFMarkdown instance."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            apply_thread_settings()
+            _pool = MarkerModelPool(memory_budget_mb=MEMORY_BUDGET_MB)
+            if not MEMORY_BUDGET_MB:
+                _pool.load_all()
+        return _pool
+
+
+def as_model_pool(model_lst) -> MarkerModelPool:
+    if isinstance(model_lst, MarkerModelPool):
+        return model_lst
+    return MarkerModelPool.from_list(model_lst)
+
+
+def spill_images(doc_images: Dict, spill_dir: str) -> Dict[str, str]:
+    """Write extracted images to disk and return name -> path, freeing the in-memory copies."""
+    os.makedirs(spill_dir, exist_ok=True)
+    paths = {}
+    for name, image in doc_images.items():
+        path = os.path.join(spill_dir, os.path.basename(name))
+        image.save(path)
+        paths[name] = path
+    doc_images.clear()
+    return paths
+
+
+def as_pdf_source(file_content):
+    """
+    Normalise uploaded content into something pdfium and pdftext open directly
+    from memory. bytes (and memoryviews over whole bytes objects) pass through
+    without a copy; paths are left as they are.
+    """
+    if isinstance(file_content, memoryview):
+        if isinstance(file_content.obj, bytes) and file_content.contiguous and file_content.nbytes == len(file_content.obj):
+            return file_content.obj
+        return file_content.tobytes()
+    if isinstance(file_content, bytearray):
+        return bytes(file_content)
+    return file_content
+
+
+def find_source_filetype(source) -> str:
+    """marker's find_filetype for paths; a %PDF header check for in-memory content."""
+    if isinstance(source, (str, os.PathLike)):
+        from marker.pdf.utils import find_filetype
+        return find_filetype(source)
+    return "pdf" if b"%PDF-" in source[:1024] else "other"
+
+
+def count_pdf_pages(source) -> int:
+    import pypdfium2 as pdfium
+    doc = pdfium.PdfDocument(source)
+    try:
+        return len(doc)
+    finally:
+        doc.close()
+
+
+def iter_pdf_windows(convert_fn: Callable, source, model_lst, file_id: str = None,
+                     page_window: int = None, image_mode: str = None,
+                     progress_callback: Callable = None, cancel_token=None, **kwargs):
+    """
+    Run convert_fn over the PDF in windows of page_window pages and yield
+    (full_text, doc_images, window_meta) as each window finishes, so page blocks
+    and images only exist for one window at a time. A window of 0 converts the
+    whole document in one call.
+    """
+    page_window = PAGE_WINDOW if page_window is None else page_window
+    image_mode = image_mode or IMAGE_MODE
+    spill_dir = os.path.join(IMAGE_SPILL_DIR, file_id or str(os.getpid()))
+    extract_figures = image_mode != "off"
+
+    page_count = count_pdf_pages(source) if page_window else 0
+    if not page_window or page_count <= page_window:
+        windows = [(None, None)]
+    else:
+        windows = [(start, min(page_window, page_count - start)) for start in range(0, page_count, page_window)]
+
+    for window_idx, (start_page, max_pages) in enumerate(windows):
+        check_cancelled(cancel_token, f"window {window_idx + 1}/{len(windows)}")
+        window_callback = None
+        if progress_callback and len(windows) > 1:
+            def window_callback(step, step_name, window_idx=window_idx):
+                progress_callback((window_idx * 100 + step) / len(windows), f"Pages window {window_idx + 1}/{len(windows)}: {step_name}")
+        elif progress_callback:
+            window_callback = progress_callback
+
+        if window_callback:
+            kwargs["progress_callback"] = window_callback
+        if cancel_token is not None:
+            kwargs["cancel_token"] = cancel_token
+        full_text, doc_images, window_meta = convert_fn(
+            source, model_lst=model_lst, start_page=start_page, max_pages=max_pages,
+            extract_figures=extract_figures, **kwargs
+        )
+        if image_mode == "disk":
+            doc_images = spill_images(doc_images, spill_dir)
+        window_meta["window"] = (window_idx + 1, len(windows))
+        sample_memory(f"window:{window_idx + 1}")
+        yield full_text, doc_images, window_meta
+        gc.collect()
+
+
+def convert_pdf_windowed(convert_fn: Callable, source, model_lst, **kwargs):
+    """Convert the whole PDF through iter_pdf_windows and attach a memory report to out_meta."""
+    texts = []
+    all_images = {}
+    out_meta = {"pages": 0, "windows": 0}
+    with memory_monitor() as monitor:
+        for full_text, doc_images, window_meta in iter_pdf_windows(convert_fn, source, model_lst, **kwargs):
+            texts.append(full_text)
+            all_images.update(doc_images)
+            out_meta["windows"] += 1
+            out_meta["pages"] += window_meta.pop("pages", 0)
+            window_meta.pop("window")
+            for key, value in window_meta.items():
+                out_meta.setdefault(key, value)
+            out_meta.setdefault("window_stats", []).append(window_meta)
+
+    out_meta["memory"] = monitor.report()
+    print(f"Conversion memory: peak {out_meta['memory']['peak_rss_mb']} MB "
+          f"(process peak {out_meta['memory']['process_peak_rss_mb']} MB), windows={out_meta['windows']}")
+    return "\n\n".join(text for text in texts if text), all_images, out_meta
@@ -0,0 +1,83 @@
+import threading
+import time
+import traceback
+from typing import Dict
+
+_status = {"state": "cold", "error": None, "import_seconds": None, "load_seconds": None, "warmup_seconds": None}
+_status_lock = threading.Lock()
+_ready = threading.Event()
+_thread = None
+
+
+def _set_status(**values) -> None:
+    with _status_lock:
+        _status.update(values)
+
+
+def get_warmup_status() -> Dict:
+    """Readiness of the conversion models: cold, importing, loading, warming, ready or failed."""
+    with _status_lock:
+        return dict(_status)
+
+
+def wait_until_ready(timeout: float = None) -> bool:
+    return _ready.wait(timeout)
+
+
+def build_warmup_pdf() -> bytes:
+    """A one-page PDF with a heading and a paragraph of real text, built without extra dependencies."""
+    stream = (b"BT /F1 18 Tf 72 720 Td (1. Scope of Work) Tj ET\n"
+              b"BT /F1 11 Tf 72 690 Td (The supplier shall deliver all items within 30 days of the order.) Tj ET\n")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"endstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_offset = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return pdf
+
+
+def _warm_up() -> None:
+    try:
+        _set_status(state="importing")
+        started = time.time()
+        from utils.markdown_utils_experimental import PDFMarkdown
+        from utils.marker_models import get_marker_models
+        _set_status(state="loading", import_seconds=round(time.time() - started, 2))
+
+        started = time.time()
+        model_lst = get_marker_models()
+        _set_status(state="warming", load_seconds=round(time.time() - started, 2))
+
+        started = time.time()
+        PDFMarkdown(file_id="warmup").convert_single_pdf(build_warmup_pdf(), model_lst, extract_figures=False)
+        _set_status(state="ready", warmup_seconds=round(time.time() - started, 2))
+    except Exception as e:
+        traceback.print_exc()
+        _set_status(state="failed", error=str(e))
+    finally:
+        _ready.set()
+
+
+def start_model_warmup() -> None:
+    """
+    Import the marker stack, load the shared model pool and run one tiny conversion
+    on a daemon thread, so the first real upload does not pay the cold-start cost.
+    Calling it again is a no-op.
+    """
+    global _thread
+    with _status_lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=_warm_up, name="marker-warmup", daemon=True)
+    _thread.start()
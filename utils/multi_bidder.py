@@ -0,0 +1,166 @@
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Optional
+from utils.compliance_check import ComplianceChecker, RESULT_COLUMNS, clause_key
+from utils.document_store import file_hash
+from utils.llm_client import LLMClient, RateLimiter, make_llm_client
+from utils.result_buffer import ColumnarBuffer
+from utils.excel_io import write_workbook
+from utils.profiling import in_run_context
+
+
+class MultiBidderEvaluation:
+    """
+    Scores several bidders' tenders against one SOTR matrix in a single pass.
+
+    The matrix is parsed once and shared. Bidder PDFs are converted through the
+    shared marker model pool, and as soon as a bidder's conversion finishes its
+    clause batches join one LLM worker pool whose calls go through a single
+    rate limiter.
+    """
+
+    def __init__(self, store=None, llm_client: Optional[LLMClient] = None, rate_limiter: Optional[RateLimiter] = None,
+                 llm_workers: int = 8, conversion_workers: int = 1, batch_size: int = 10) -> None:
+        self.store = store
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.llm_client = llm_client or make_llm_client(rate_limiter=self.rate_limiter)
+        if self.llm_client.rate_limiter is None:
+            self.llm_client.rate_limiter = self.rate_limiter
+        self.llm_workers = llm_workers
+        self.conversion_workers = conversion_workers
+        self.batch_size = batch_size
+        self.matrix_checker = ComplianceChecker(store=store)
+        self.bidders: Dict[str, bytes] = {}
+        self.checkers: Dict[str, ComplianceChecker] = {}
+        self.results: Dict[str, pd.DataFrame] = {}
+        self.cancel_token = None
+
+    def load_matrix(self, sotr_matrix_file_content: bytes) -> None:
+        self.matrix_checker.load_matrix(sotr_matrix_file_content)
+
+    def add_bidder(self, bidder_name: str, tender_file_content: bytes) -> str:
+        """
+        Add a bidder's tender and return the name it is listed under. A different
+        document under a name already in use gets a short content hash appended;
+        the same document added twice is rejected.
+        """
+        if bidder_name in self.bidders:
+            if self.bidders[bidder_name] == tender_file_content:
+                raise Exception(f"Bidder document {bidder_name} was added twice.")
+            bidder_name = f"{bidder_name} ({file_hash(tender_file_content)[:8]})"
+            if bidder_name in self.bidders:
+                raise Exception(f"Bidder document {bidder_name} was added twice.")
+        self.bidders[bidder_name] = tender_file_content
+        return bidder_name
+
+    def _new_checker(self) -> ComplianceChecker:
+        checker = ComplianceChecker(store=self.store, llm_client=self.llm_client)
+        checker.sotr_matrix_content = self.matrix_checker.sotr_matrix_content
+        checker.matrix_hash = self.matrix_checker.matrix_hash
+        checker.cancel_token = self.cancel_token
+        return checker
+
+    def _load_bidder(self, bidder_name: str) -> ComplianceChecker:
+        checker = self._new_checker()
+        checker.load_tender(self.bidders[bidder_name], bidder_name)
+        checker.prescreen()
+        return checker
+
+    def evaluate(self, progress_callback: Optional[Callable] = None, reuse_stored: bool = True) -> Dict[str, pd.DataFrame]:
+        """
+        Run every bidder's clause batches concurrently. progress_callback receives
+        (completed_batches, total_batches). Without reuse_stored, stored results and
+        checkpoints are ignored and every clause is checked again.
+        Returns bidder name -> results DataFrame.
+        """
+        if self.matrix_checker.sotr_matrix_content is None:
+            raise Exception("SOTR matrix not loaded.")
+        if not self.bidders:
+            raise Exception("No bidder documents added.")
+
+        batch_results: Dict[str, Dict[int, pd.DataFrame]] = {name: {} for name in self.bidders}
+        # Until a bidder is prescreened, assume all of its clauses need the LLM
+        planned_batches = {name: -(-len(self.matrix_checker.sotr_matrix_content) // self.batch_size) for name in self.bidders}
+        completed = 0
+
+        with ThreadPoolExecutor(max_workers=self.conversion_workers) as conversion_pool, \
+                ThreadPoolExecutor(max_workers=self.llm_workers) as llm_pool:
+            batch_futures = {}
+            conversion_futures = {conversion_pool.submit(in_run_context(self._load_bidder), name): name for name in self.bidders}
+            try:
+                for future in as_completed(conversion_futures):
+                    bidder_name = conversion_futures[future]
+                    checker = future.result()
+                    self.checkers[bidder_name] = checker
+
+                    stored = checker.stored_results() if reuse_stored else None
+                    if stored is not None:
+                        self.results[bidder_name] = stored
+                        completed += planned_batches[bidder_name]
+                        if progress_callback:
+                            progress_callback(completed, sum(planned_batches.values()))
+                        continue
+
+                    batches = list(checker.iter_batches(self.batch_size))
+                    planned_batches[bidder_name] = len(batches)
+                    checkpoints = checker.load_checkpoints() if reuse_stored else {}
+                    for batch_index, rows in enumerate(batches):
+                        checkpointed = checker.checkpointed_batch(checkpoints, batch_index, rows)
+                        if checkpointed is not None:
+                            batch_results[bidder_name][batch_index] = checkpointed
+                            completed += 1
+                            continue
+                        batch_futures[llm_pool.submit(in_run_context(checker.check_batch), rows)] = (bidder_name, batch_index, rows)
+
+                for future in as_completed(batch_futures):
+                    bidder_name, batch_index, rows = batch_futures[future]
+                    batch_results[bidder_name][batch_index] = future.result()
+                    self.checkers[bidder_name].save_checkpoint(batch_index, rows, batch_results[bidder_name][batch_index])
+                    completed += 1
+                    if progress_callback:
+                        progress_callback(completed, sum(planned_batches.values()))
+            except BaseException as e:
+                # Queued conversions and batches are dropped; the token is cancelled so running ones
+                # stop at their next cancellation check instead of the pools waiting for them
+                for future in list(conversion_futures) + list(batch_futures):
+                    future.cancel()
+                if self.cancel_token is not None:
+                    self.cancel_token.cancel(f"stopped by {type(e).__name__}")
+                raise
+
+        for bidder_name, batches in batch_results.items():
+            if bidder_name in self.results:
+                continue
+            checker = self.checkers[bidder_name]
+            llm_results = ColumnarBuffer(RESULT_COLUMNS)
+            for batch_index in sorted(batches):
+                llm_results.append_frame(batches[batch_index])
+            self.results[bidder_name] = checker.merge_results(llm_results.to_frame())
+            checker.save_results(self.results[bidder_name])
+
+        return self.results
+
+    def comparison_frame(self) -> pd.DataFrame:
+        """One row per matrix clause, one Status column per bidder."""
+        matrix = self.matrix_checker.sotr_matrix_content
+        comparison = pd.DataFrame({
+            "Clause Number": [str(index) for index in matrix.index],
+            "Clause": matrix["Clause"].values,
+        })
+        for bidder_name, results in self.results.items():
+            statuses = {clause_key(clause_number): status
+                        for clause_number, status in zip(results.get("Clause Number", []), results.get("Status", []))}
+            comparison[bidder_name] = comparison["Clause Number"].map(statuses).fillna("Unknown")
+        return comparison
+
+    def to_workbook(self) -> bytes:
+        """Comparison sheet followed by one detailed sheet per bidder."""
+        sheets = {'Comparison': self.comparison_frame()}
+        for bidder_name, results in self.results.items():
+            sheet_name = "".join(c for c in bidder_name if c not in '[]:*?/\\')[:31] or "Bidder"
+            suffix = 2
+            while sheet_name in sheets:
+                sheet_name = f"{sheet_name[:28]}_{suffix}"
+                suffix += 1
+            sheets[sheet_name] = results
+        return write_workbook(sheets)
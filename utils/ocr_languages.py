@@ -0,0 +1,187 @@
+import os
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+# Candidate OCR languages when convert_single_pdf gets none, e.g. "en,hi" for bilingual tenders
+OCR_LANGUAGES = [lang.strip() for lang in os.getenv("OCR_LANGUAGES", "").split(",") if lang.strip()]
+OCR_LANGUAGE_ROUTING = os.getenv("OCR_LANGUAGE_ROUTING", "1") != "0"
+# Detected lines recognised per scanned page (with every candidate language) to find its scripts; 0 disables
+OCR_LANG_PROBE_LINES = int(os.getenv("OCR_LANG_PROBE_LINES", "8"))
+# Letters of a script needed before it counts as present on a page
+MIN_SCRIPT_LETTERS = 4
+
+SCRIPT_RANGES = [
+    ("Latin", 0x0041, 0x005A), ("Latin", 0x0061, 0x007A), ("Latin", 0x00C0, 0x024F),
+    ("Greek", 0x0370, 0x03FF), ("Cyrillic", 0x0400, 0x04FF), ("Hebrew", 0x0590, 0x05FF),
+    ("Arabic", 0x0600, 0x06FF), ("Devanagari", 0x0900, 0x097F), ("Bengali", 0x0980, 0x09FF),
+    ("Gurmukhi", 0x0A00, 0x0A7F), ("Gujarati", 0x0A80, 0x0AFF), ("Oriya", 0x0B00, 0x0B7F),
+    ("Tamil", 0x0B80, 0x0BFF), ("Telugu", 0x0C00, 0x0C7F), ("Kannada", 0x0C80, 0x0CFF),
+    ("Malayalam", 0x0D00, 0x0D7F), ("Thai", 0x0E00, 0x0E7F), ("Kana", 0x3040, 0x30FF),
+    ("Han", 0x4E00, 0x9FFF), ("Hangul", 0xAC00, 0xD7AF),
+]
+
+# Surya language codes by script; languages not listed here are never routed away
+SCRIPT_LANGUAGES = {
+    "Latin": {"af", "az", "br", "bs", "ca", "cs", "cy", "da", "de", "en", "eo", "es", "et", "eu", "fi", "fr", "fy",
+              "ga", "gd", "gl", "ha", "hr", "hu", "id", "is", "it", "jv", "ku", "la", "lt", "lv", "mg", "ms", "nl",
+              "no", "om", "pl", "pt", "ro", "sk", "sl", "so", "sq", "su", "sv", "sw", "tl", "tr", "uz", "vi", "xh"},
+    "Greek": {"el"},
+    "Cyrillic": {"be", "bg", "kk", "ky", "mk", "mn", "ru", "sr", "uk"},
+    "Hebrew": {"he", "yi"},
+    "Arabic": {"ar", "fa", "ps", "sd", "ug", "ur"},
+    "Devanagari": {"hi", "mr", "ne", "sa"},
+    "Bengali": {"as", "bn"},
+    "Gurmukhi": {"pa"},
+    "Gujarati": {"gu"},
+    "Oriya": {"or"},
+    "Tamil": {"ta"},
+    "Telugu": {"te"},
+    "Kannada": {"kn"},
+    "Malayalam": {"ml"},
+    "Thai": {"th"},
+    "Kana": {"ja"},
+    "Han": {"ja", "zh"},
+    "Hangul": {"ko"},
+}
+LANGUAGE_SCRIPTS: Dict[str, Set[str]] = defaultdict(set)
+for _script, _languages in SCRIPT_LANGUAGES.items():
+    for _language in _languages:
+        LANGUAGE_SCRIPTS[_language].add(_script)
+
+
+def char_script(char: str) -> Optional[str]:
+    code = ord(char)
+    for script, low, high in SCRIPT_RANGES:
+        if low <= code <= high:
+            return script
+    return None
+
+
+def detect_scripts(text: str, min_letters: int = MIN_SCRIPT_LETTERS) -> Set[str]:
+    """Scripts with at least min_letters letters in text (digits and punctuation belong to none)."""
+    counts = Counter(char_script(char) for char in text if not char.isspace())
+    counts.pop(None, None)
+    return {script for script, count in counts.items() if count >= min_letters}
+
+
+def languages_for_scripts(scripts: Set[str], langs: List[str]) -> List[str]:
+    """The candidate languages written in one of scripts; all of them when none match."""
+    if not scripts:
+        return list(langs)
+    routed = [lang for lang in langs if lang not in LANGUAGE_SCRIPTS or LANGUAGE_SCRIPTS[lang] & scripts]
+    return routed or list(langs)
+
+
+def routing_applies(langs: Optional[List[str]]) -> bool:
+    """Routing only helps with the surya engine and candidates spanning more than one script."""
+    from marker.settings import settings
+    if not OCR_LANGUAGE_ROUTING or settings.OCR_ENGINE != "surya" or not langs:
+        return False
+    return len(set().union(*(LANGUAGE_SCRIPTS.get(lang, {lang}) for lang in langs))) > 1
+
+
+def _sample(items: List, count: int) -> List:
+    if len(items) <= count:
+        return list(items)
+    step = len(items) / count
+    return [items[int(i * step)] for i in range(count)]
+
+
+def probe_scripts(doc, page_idxs: List[int], pages, langs: List[str], rec_model, batch_multiplier=1,
+                  lines_per_page: int = OCR_LANG_PROBE_LINES) -> Dict[int, Set[str]]:
+    """
+    Recognise a few detected lines spread over each page with every candidate
+    language and return the scripts found per page. The page renders are shared
+    with the full OCR pass through the page cache.
+    """
+    from surya.ocr import run_recognition
+    from marker.ocr.recognition import get_batch_size
+    from marker.pdf.images import render_image
+    from marker.settings import settings
+
+    page_idxs = [pnum for pnum in page_idxs if pages[pnum].text_lines.bboxes]
+    if not page_idxs:
+        return {}
+    images = [render_image(doc[pnum], dpi=settings.SURYA_OCR_DPI) for pnum in page_idxs]
+    polygons = [[bbox.polygon for bbox in _sample(pages[pnum].text_lines.bboxes, lines_per_page)] for pnum in page_idxs]
+    results = run_recognition(images, [list(langs)] * len(page_idxs), rec_model, rec_model.processor,
+                              polygons=polygons, batch_size=int(get_batch_size() * batch_multiplier))
+    return {pnum: detect_scripts(" ".join(line.text for line in result.text_lines))
+            for pnum, result in zip(page_idxs, results)}
+
+
+def route_page_languages(doc, pages, ocr_idxs: List[int], langs: List[str], rec_model,
+                         batch_multiplier=1) -> Tuple[Dict[int, List[str]], Dict[int, str]]:
+    """
+    Languages to OCR each page with, and where that choice came from: the page's
+    own text layer when it reads cleanly, else a probe of a few lines, else all
+    candidate languages.
+    """
+    from marker.ocr.heuristics import detect_bad_ocr, detected_line_coverage
+
+    page_langs, sources = {}, {}
+    to_probe = []
+    for pnum in ocr_idxs:
+        page = pages[pnum]
+        text = page.prelim_text or ""
+        covered, _ = detected_line_coverage(page)
+        scripts = detect_scripts(text) if covered and text.strip() and not detect_bad_ocr(text) else set()
+        if scripts:
+            page_langs[pnum], sources[pnum] = languages_for_scripts(scripts, langs), "text"
+        else:
+            to_probe.append(pnum)
+
+    probed = probe_scripts(doc, to_probe, pages, langs, rec_model, batch_multiplier) if to_probe and OCR_LANG_PROBE_LINES else {}
+    for pnum in to_probe:
+        scripts = probed.get(pnum)
+        if scripts:
+            page_langs[pnum], sources[pnum] = languages_for_scripts(scripts, langs), "probe"
+        else:
+            page_langs[pnum], sources[pnum] = list(langs), "all"
+    return page_langs, sources
+
+
+def run_ocr_routed(doc, pages, langs: Optional[List[str]], rec_model, batch_multiplier=1, ocr_all_pages=False,
+                   first_page: int = 0):
+    """
+    Drop-in for marker's run_ocr that OCRs each page with only the candidate
+    languages it needs, grouping pages by language set. Candidates are langs, or
+    OCR_LANGUAGES when none are given. Returns (pages, ocr_stats, language_stats).
+    """
+    from marker.ocr.heuristics import detect_bad_ocr, no_text_found, should_ocr_page
+    from marker.ocr.recognition import run_ocr, surya_recognition
+
+    candidates = list(langs) if langs else list(OCR_LANGUAGES)
+    if not langs and candidates:
+        from marker.ocr.lang import validate_langs
+        validate_langs(candidates)
+    if not routing_applies(candidates):
+        pages, ocr_stats = run_ocr(doc, pages, langs or candidates or None, rec_model,
+                                   batch_multiplier=batch_multiplier, ocr_all_pages=ocr_all_pages)
+        return pages, ocr_stats, {"routed": False, "languages": candidates}
+
+    no_text = no_text_found(pages)
+    ocr_idxs = [pnum for pnum, page in enumerate(pages) if should_ocr_page(page, no_text, ocr_all_pages=ocr_all_pages)]
+    ocr_stats = {"ocr_pages": len(ocr_idxs), "ocr_failed": 0, "ocr_success": 0, "ocr_engine": "surya" if ocr_idxs else "none"}
+    language_stats = {"routed": True, "languages": candidates, "page_languages": {}, "language_sets": {}, "sources": {}}
+    if not ocr_idxs:
+        return pages, ocr_stats, language_stats
+
+    page_langs, sources = route_page_languages(doc, pages, ocr_idxs, candidates, rec_model, batch_multiplier)
+    groups = defaultdict(list)
+    for pnum in ocr_idxs:
+        groups[tuple(page_langs[pnum])].append(pnum)
+
+    for group_langs, group_idxs in groups.items():
+        new_pages = surya_recognition(doc, group_idxs, list(group_langs), rec_model, pages, batch_multiplier=batch_multiplier)
+        for pnum, page in zip(group_idxs, new_pages):
+            if detect_bad_ocr(page.prelim_text) or len(page.prelim_text) == 0:
+                ocr_stats["ocr_failed"] += 1
+            else:
+                ocr_stats["ocr_success"] += 1
+                pages[pnum] = page
+
+    language_stats["page_languages"] = {first_page + pnum: ",".join(page_langs[pnum]) for pnum in ocr_idxs}
+    language_stats["language_sets"] = dict(Counter(language_stats["page_languages"].values()))
+    language_stats["sources"] = dict(Counter(sources.values()))
+    return pages, ocr_stats, language_stats
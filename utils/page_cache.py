@@ -0,0 +1,184 @@
+import mmap
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from PIL import Image
+from utils.cancellation import check_cancelled
+
+# Byte cap for rendered pages held in memory per conversion; pages rendered once it
+# is full are not kept, or go to an mmap-backed temp file with MARKER_PAGE_CACHE_SPILL=1.
+PAGE_CACHE_MB = int(os.getenv("MARKER_PAGE_CACHE_MB", "512"))
+PAGE_CACHE_SPILL = os.getenv("MARKER_PAGE_CACHE_SPILL", "0") != "0"
+
+
+class _SpillFile:
+    """Append-only temp file for evicted page bitmaps, read back through mmap."""
+
+    def __init__(self) -> None:
+        self.file = tempfile.TemporaryFile()
+        self.size = 0
+        self.map: Optional[mmap.mmap] = None
+
+    def write(self, data: bytes) -> int:
+        offset = self.size
+        self.file.seek(offset)
+        self.file.write(data)
+        self.file.flush()
+        self.size += len(data)
+        return offset
+
+    def read(self, offset: int, length: int) -> bytes:
+        if self.map is None or len(self.map) < offset + length:
+            if self.map is not None:
+                self.map.close()
+            self.map = mmap.mmap(self.file.fileno(), self.size, access=mmap.ACCESS_READ)
+        return self.map[offset:offset + length]
+
+    def close(self) -> None:
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+
+class _RenderedBitmap:
+    """Stands in for a pdfium PdfBitmap: marker only calls to_pil() on it."""
+
+    def __init__(self, image: Image.Image) -> None:
+        self.image = image
+
+    def to_pil(self) -> Image.Image:
+        return self.image
+
+
+class _CachedPage:
+    def __init__(self, cache: "PageImageCache", page_idx: int, page) -> None:
+        self._cache = cache
+        self._page_idx = page_idx
+        self._page = page
+
+    def render(self, **kwargs) -> _RenderedBitmap:
+        return _RenderedBitmap(self._cache.render(self._page_idx, self._page, kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._page, name)
+
+
+class _CachedDocument:
+    """Proxy for a pdfium PdfDocument whose pages render through the shared cache."""
+
+    def __init__(self, cache: "PageImageCache", doc) -> None:
+        self._cache = cache
+        self._doc = doc
+
+    def __getitem__(self, page_idx: int) -> _CachedPage:
+        return _CachedPage(self._cache, page_idx, self._doc[page_idx])
+
+    def __len__(self) -> int:
+        return len(self._doc)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __getattr__(self, name):
+        return getattr(self._doc, name)
+
+
+class PageImageCache:
+    """
+    Renders each page once per set of render arguments (i.e. per DPI) and hands
+    the image to every surya stage that asks for it.
+
+    Images are kept in memory until a byte cap is reached; pages rendered after
+    that are not kept, or with spill enabled go to an mmap-backed temp file instead.
+    Every stage scans the pages in order, so evicting the least recently used page
+    would drop each page just before the next stage asks for it: keeping the first
+    pages instead gives every later stage hits on them. Render and hit counts are
+    kept per stage (set with stage()).
+    """
+
+    def __init__(self, max_mb: int = None, spill: bool = None, cancel_token=None) -> None:
+        self.max_bytes = (PAGE_CACHE_MB if max_mb is None else max_mb) * 1024 * 1024
+        self.spill = PAGE_CACHE_SPILL if spill is None else spill
+        self.images: Dict[tuple, Image.Image] = {}
+        self.spilled: Dict[tuple, tuple] = {}
+        self.bytes = 0
+        self.current_stage = "other"
+        self.renders = defaultdict(int)
+        self.hits = defaultdict(int)
+        self.spill_reads = defaultdict(int)
+        self._spill_file: Optional[_SpillFile] = None
+        self._lock = threading.Lock()
+        self.cancel_token = cancel_token
+
+    def wrap(self, doc) -> _CachedDocument:
+        return _CachedDocument(self, doc)
+
+    @contextmanager
+    def stage(self, name: str):
+        previous = self.current_stage
+        self.current_stage = name
+        try:
+            yield
+        finally:
+            self.current_stage = previous
+
+    def render(self, page_idx: int, page, render_kwargs: Dict) -> Image.Image:
+        key = (page_idx, tuple(sorted(render_kwargs.items())))
+        with self._lock:
+            image = self.images.get(key)
+            if image is not None:
+                self.hits[self.current_stage] += 1
+                return image
+            if key in self.spilled:
+                mode, size, offset, length = self.spilled[key]
+                self.spill_reads[self.current_stage] += 1
+                return Image.frombytes(mode, size, self._spill_file.read(offset, length))
+
+        # Every stage renders page by page, so this is also the per-page cancellation point
+        check_cancelled(self.cancel_token, f"{self.current_stage} page {page_idx}")
+        image = page.render(**render_kwargs).to_pil()
+        with self._lock:
+            self.renders[self.current_stage] += 1
+            self._store(key, image)
+        return image
+
+    @staticmethod
+    def _image_bytes(image: Image.Image) -> int:
+        return image.width * image.height * len(image.getbands())
+
+    def _store(self, key: tuple, image: Image.Image) -> None:
+        if key in self.images or key in self.spilled:
+            return
+        image_bytes = self._image_bytes(image)
+        if self.bytes + image_bytes <= self.max_bytes:
+            self.images[key] = image
+            self.bytes += image_bytes
+        elif self.spill:
+            if self._spill_file is None:
+                self._spill_file = _SpillFile()
+            data = image.tobytes()
+            self.spilled[key] = (image.mode, image.size, self._spill_file.write(data), len(data))
+
+    def stats(self) -> Dict:
+        stages = set(self.renders) | set(self.hits) | set(self.spill_reads)
+        return {
+            "renders": sum(self.renders.values()),
+            "hits": sum(self.hits.values()),
+            "spill_reads": sum(self.spill_reads.values()),
+            "cached_mb": round(self.bytes / (1024 * 1024), 1),
+            "per_stage": {stage: {"renders": self.renders[stage], "hits": self.hits[stage],
+                                  "spill_reads": self.spill_reads[stage]} for stage in sorted(stages)},
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self.images.clear()
+            self.spilled.clear()
+            self.bytes = 0
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
@@ -0,0 +1,187 @@
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+# Profile pipeline runs by default (the demo sidebar can also switch it on per session)
+PROFILE_ENABLED = os.getenv("TENDER_PROFILE", "0") != "0"
+PROFILE_DIR = os.getenv("TENDER_PROFILE_DIR", "profiles")
+PROFILE_TOP = int(os.getenv("TENDER_PROFILE_TOP", "30"))
+
+_NO_STAGE = nullcontext()
+# Only one run is profiled at a time: tracemalloc is process-wide
+_run_lock = threading.Lock()
+# The run profiling the current context: set on the thread that starts it and carried to
+# its workers with in_run_context, so other sessions' stages never reach its report
+_current: contextvars.ContextVar[Optional["RunProfiler"]] = contextvars.ContextVar("profiled_run", default=None)
+
+
+class RunProfiler:
+    """
+    cProfile + tracemalloc capture of one pipeline run.
+
+    Stages (profile_stage) opened on the thread that started the run get their
+    own cProfile, so the report lists top functions per stage. Stages on the
+    run's worker threads (LLM calls submitted through in_run_context) are only
+    recorded in the timeline.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.thread_id = threading.get_ident()
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self._stack: List[cProfile.Profile] = []
+        self.timeline: List[tuple] = []
+        self._timeline_lock = threading.Lock()
+        self.started = None
+        self.seconds = 0.0
+        self.snapshot = None
+        self.peak_bytes = 0
+        self.report_text = None
+        self.report_path = None
+        self._owns_tracemalloc = False
+
+    def _profile_for(self, stage: str) -> cProfile.Profile:
+        if stage not in self.profiles:
+            self.profiles[stage] = cProfile.Profile()
+        return self.profiles[stage]
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        self.started = time.perf_counter()
+        profile = self._profile_for("(run)")
+        self._stack.append(profile)
+        profile.enable()
+
+    def stop(self) -> None:
+        while self._stack:
+            self._stack.pop().disable()
+        self.seconds = time.perf_counter() - self.started
+        # Leave out the profiler's own bookkeeping
+        self.snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, __file__),
+                                                                    tracemalloc.Filter(False, tracemalloc.__file__)])
+        self.peak_bytes = tracemalloc.get_traced_memory()[1]
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str):
+        on_run_thread = threading.get_ident() == self.thread_id
+        if on_run_thread:
+            self._stack[-1].disable()
+            self._stack.append(self._profile_for(name))
+            self._stack[-1].enable()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            memory_delta = tracemalloc.get_traced_memory()[0] - memory_before
+            if on_run_thread:
+                self._stack.pop().disable()
+                self._stack[-1].enable()
+            with self._timeline_lock:
+                self.timeline.append((name, threading.current_thread().name, started - self.started,
+                                      ended - started, memory_delta))
+
+    def report(self, top: int = PROFILE_TOP) -> str:
+        out = io.StringIO()
+        out.write(f"Profile of {self.name}: {self.seconds:.2f}s wall, tracemalloc peak {self.peak_bytes / 2**20:.1f} MB\n")
+
+        out.write("\n== Stage totals ==\n")
+        totals: Dict[str, List[float]] = {}
+        for name, _, _, seconds, memory_delta in self.timeline:
+            total = totals.setdefault(name, [0, 0.0, 0])
+            total[0] += 1
+            total[1] += seconds
+            total[2] += memory_delta
+        out.write(f"{'stage':<24} {'count':>6} {'seconds':>9} {'net MB':>8}\n")
+        for name, (count, seconds, memory_delta) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            out.write(f"{name:<24} {count:>6} {seconds:>9.2f} {memory_delta / 2**20:>8.1f}\n")
+
+        out.write("\n== Stage timeline ==\n")
+        out.write(f"{'start':>8} {'seconds':>8} {'net MB':>7}  stage [thread]\n")
+        for name, thread_name, offset, seconds, memory_delta in sorted(self.timeline, key=lambda entry: entry[2]):
+            out.write(f"{offset:>8.2f} {seconds:>8.2f} {memory_delta / 2**20:>7.1f}  {name} [{thread_name}]\n")
+
+        out.write("\n== Top allocations (live at end of run) ==\n")
+        if self.snapshot is not None:
+            for stat in self.snapshot.statistics("lineno")[:top]:
+                out.write(f"{stat.size / 2**10:>10.1f} KiB {stat.count:>8} blocks  {stat.traceback}\n")
+
+        for stage, profile in self.profiles.items():
+            stats = pstats.Stats(profile, stream=out)
+            if not stats.stats:
+                continue
+            out.write(f"\n== Top functions: {stage} ==\n")
+            stats.sort_stats("cumulative").print_stats(top)
+        return out.getvalue()
+
+    def save(self) -> str:
+        """Write the text report plus a merged .prof file (for snakeviz/pstats) to PROFILE_DIR."""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{self.name}_{time.strftime('%Y%m%d_%H%M%S')}")
+        with open(f"{base}.txt", "w") as f:
+            f.write(self.report_text)
+        profiles = [profile for profile in self.profiles.values() if pstats.Stats(profile).stats]
+        if profiles:
+            pstats.Stats(*profiles).dump_stats(f"{base}.prof")
+        self.report_path = f"{base}.txt"
+        return self.report_path
+
+
+@contextmanager
+def profile_run(name: str, enabled: bool = None):
+    """
+    Profile the enclosed run and yield its RunProfiler (None when profiling is off
+    or another run is already being profiled). The report is built and saved on exit.
+    """
+    if not (PROFILE_ENABLED if enabled is None else enabled):
+        yield None
+        return
+    if not _run_lock.acquire(blocking=False):
+        print(f"Profiling skipped for {name}: another run is being profiled")
+        yield None
+        return
+
+    profiler = RunProfiler(name)
+    context_token = _current.set(profiler)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _current.reset(context_token)
+        _run_lock.release()
+        profiler.report_text = profiler.report()
+        print(f"Profile report saved to {profiler.save()}")
+        # The report holds everything needed from here on
+        profiler.snapshot = None
+        profiler.profiles.clear()
+
+
+def profile_stage(name: str):
+    """Tag the enclosed work with a pipeline stage; a shared no-op context when nothing is profiled."""
+    profiler = _current.get()
+    if profiler is None:
+        return _NO_STAGE
+    return profiler.stage(name)
+
+
+def in_run_context(fn):
+    """
+    fn bound to a copy of the caller's context, for executor.submit: worker threads
+    do not inherit contextvars, so without it their stages would not count towards
+    the caller's profiled run. Bind once per submit (a context runs on one thread at a time).
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
@@ -0,0 +1,161 @@
+import os
+import re
+import threading
+from difflib import SequenceMatcher, get_close_matches
+from typing import Dict, List, Optional, Tuple
+
+from utils.models import QuestionInputFormat
+from utils.tender_qa import tokenize
+
+# Answer the standard questions once per tender, right after it is indexed
+DIGEST_ENABLED = os.getenv("TENDER_QA_DIGEST", "1") != "0"
+# Optional text file with one standard question per line, replacing DEFAULT_STANDARD_QUESTIONS
+STANDARD_QUESTIONS_FILE = os.getenv("TENDER_QA_STANDARD_QUESTIONS")
+CACHE_THRESHOLD = float(os.getenv("TENDER_QA_CACHE_THRESHOLD", "0.85"))
+# Questions with fewer content words than this are too vague to answer from the cache
+MIN_QUESTION_TOKENS = 2
+# Chat answers are only cached for questions this specific; shorter ones are usually
+# follow-ups whose answer leans on the conversation
+MIN_CHAT_QUESTION_TOKENS = 3
+# Words at least this similar (difflib ratio) count as the same word misspelt
+TYPO_SIMILARITY = 0.8
+NEGATIONS = frozenset({"not", "no", "never", "without", "except", "excluding", "nor", "non"})
+
+DEFAULT_STANDARD_QUESTIONS = [
+    "What is the EMD amount and how must it be paid?",
+    "What is the bid validity period?",
+    "What is the delivery period?",
+    "What are the penalties or liquidated damages for delay?",
+    "What is the last date and time for bid submission?",
+    "What are the eligibility criteria for bidders?",
+    "What is the performance bank guarantee requirement?",
+    "What are the payment terms?",
+    "What is the warranty period?",
+]
+
+# Spelled-out forms folded into the abbreviations evaluators use, so both match
+ABBREVIATIONS = [
+    (re.compile(r"\bearnest money( deposit)?\b"), "emd"),
+    (re.compile(r"\bperformance (bank guarantee|security)\b"), "pbg"),
+    (re.compile(r"\bliquidated damages?\b"), "ld"),
+    (re.compile(r"\bpenalt(y|ies)\b"), "ld"),
+    (re.compile(r"\bdue date\b|\blast date\b|\bdeadline\b"), "deadline"),
+]
+
+
+def standard_questions() -> List[QuestionInputFormat]:
+    questions = DEFAULT_STANDARD_QUESTIONS
+    if STANDARD_QUESTIONS_FILE:
+        with open(STANDARD_QUESTIONS_FILE, "r", encoding="utf-8") as file:
+            questions = [line.strip() for line in file if line.strip() and not line.startswith("#")]
+    return [QuestionInputFormat(question_no=i, question=question) for i, question in enumerate(questions, start=1)]
+
+
+def question_tokens(question: str) -> List[str]:
+    text = question.lower()
+    # "isn't" -> "is not", "tender's" -> "tender", so negations and possessives don't leave stray letters
+    text = re.sub(r"n['\u2019]t\b", " not", text)
+    text = re.sub(r"['\u2019]s\b", "", text)
+    for pattern, abbreviation in ABBREVIATIONS:
+        text = pattern.sub(abbreviation, text)
+    # Order-preserving dedupe: "emd (earnest money deposit)" folds to one token
+    return list(dict.fromkeys(tokenize(text)))
+
+
+def identifier_tokens(tokens: List[str]) -> set:
+    """Numbers, clause numbers, codes with digits and single letters (lot 1, clause 4.2, ISO 9001, lot B)."""
+    return {token for token in tokens if len(token) == 1 or any(char.isdigit() for char in token)}
+
+
+def question_similarity(tokens: List[str], cached_tokens: List[str]) -> float:
+    """
+    Share of words the two questions have in common, counted against the longer
+    one, with misspelt words counting by how close they are. Any other word found
+    in only one of them ("delivery period" vs "delivery period for spares"), a
+    negation or a different identifier ("Lot 1" vs "Lot 2") means no match.
+    """
+    if not tokens or not cached_tokens:
+        return 0.0
+    words, cached_words = set(tokens), set(cached_tokens)
+    if identifier_tokens(tokens) != identifier_tokens(cached_tokens) or words & NEGATIONS != cached_words & NEGATIONS:
+        return 0.0
+    unmatched, cached_unmatched = sorted(words - cached_words), cached_words - words
+    if len(unmatched) != len(cached_unmatched):
+        return 0.0
+    matched = len(words & cached_words)
+    for word in unmatched:
+        close = get_close_matches(word, cached_unmatched, n=1, cutoff=TYPO_SIMILARITY)
+        if not close:
+            return 0.0
+        cached_unmatched.remove(close[0])
+        matched += SequenceMatcher(None, word, close[0]).ratio()
+    return matched / max(len(words), len(cached_words))
+
+
+class AnswerCache:
+    """
+    Per-document cache of Q&A answers, persisted in the DocumentStore.
+
+    New questions are matched against earlier ones (standard digest questions
+    and previous chat questions) on normalised words, so a rephrased question
+    gets the earlier answer without an LLM call.
+    """
+
+    def __init__(self, store, file_hash: str, threshold: float = CACHE_THRESHOLD) -> None:
+        self.store = store
+        self.file_hash = file_hash
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.entries: List[Dict] = []
+        for entry in (store.get_qa_answers(file_hash) if store is not None else []):
+            self.entries.append({**entry, "tokens": question_tokens(entry["question"])})
+        self.stats = {"hits": 0, "misses": 0}
+
+    def has_digest(self) -> bool:
+        return any(entry["origin"] == "digest" for entry in self.entries)
+
+    def digest(self) -> List[Dict]:
+        with self._lock:
+            return [entry for entry in self.entries if entry["origin"] == "digest"]
+
+    def lookup(self, question: str) -> Optional[Tuple[Dict, float]]:
+        """The most similar cached entry and its score, if it reaches the threshold."""
+        tokens = question_tokens(question)
+        best, best_score = None, 0.0
+        if len(tokens) >= MIN_QUESTION_TOKENS:
+            with self._lock:
+                entries = list(self.entries)
+            for entry in entries:
+                score = question_similarity(tokens, entry["tokens"])
+                if score > best_score:
+                    best, best_score = entry, score
+        with self._lock:
+            hit = best is not None and best_score >= self.threshold
+            self.stats["hits" if hit else "misses"] += 1
+        return (best, best_score) if hit else None
+
+    def add(self, question: str, answer: str, sources: List[str] = None, origin: str = "chat") -> None:
+        tokens = question_tokens(question)
+        min_tokens = MIN_CHAT_QUESTION_TOKENS if origin == "chat" else MIN_QUESTION_TOKENS
+        if len(tokens) < min_tokens or not answer:
+            return
+        normalized = " ".join(sorted(tokens))
+        entry = {"question": question, "normalized": normalized, "answer": answer, "sources": sources,
+                 "origin": origin, "tokens": tokens}
+        with self._lock:
+            self.entries = [e for e in self.entries if e["normalized"] != normalized] + [entry]
+        if self.store is not None:
+            self.store.save_qa_answer(self.file_hash, question, normalized, answer, sources, origin)
+
+
+def build_digest(qa_engine, cache: AnswerCache, questions: List[QuestionInputFormat] = None) -> int:
+    """Answer the standard questions in one batched call and cache them; returns the number answered."""
+    questions = questions or standard_questions()
+    answers = qa_engine.ask_many(questions)
+    for question in questions:
+        if question.question_no in answers:
+            answer, passages = answers[question.question_no]
+            sources = list(dict.fromkeys(qa_engine.format_source(p) for p in passages))
+            cache.add(question.question, answer, sources, origin="digest")
+    print(f"Q&A digest: answered {len(answers)}/{len(questions)} standard questions")
+    return len(answers)
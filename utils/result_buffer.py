@@ -0,0 +1,43 @@
+from typing import Dict, Iterable, List, Sequence
+
+import pandas as pd
+
+
+class ColumnarBuffer:
+    """
+    Append-only result table kept as one Python list per column.
+
+    Batches are appended in O(batch) instead of re-copying the whole frame with
+    pd.concat; to_frame() builds a DataFrame only when one is needed (for the
+    final result, or a live preview in the UI).
+    """
+
+    def __init__(self, columns: Sequence[str]) -> None:
+        self.columns = list(columns)
+        self.data: Dict[str, List] = {column: [] for column in self.columns}
+        self.batches = 0
+
+    def __len__(self) -> int:
+        return len(self.data[self.columns[0]]) if self.columns else 0
+
+    def append_row(self, row: Sequence) -> None:
+        for column, value in zip(self.columns, row):
+            self.data[column].append(value)
+
+    def append_rows(self, rows: Iterable[Sequence]) -> None:
+        for row in rows:
+            self.append_row(row)
+        self.batches += 1
+
+    def append_frame(self, df: pd.DataFrame) -> None:
+        """Append a batch DataFrame; columns it lacks are filled with None."""
+        size = len(df)
+        for column in self.columns:
+            self.data[column].extend(df[column].tolist() if column in df.columns else [None] * size)
+        self.batches += 1
+
+    def records(self) -> List[Dict]:
+        return [dict(zip(self.columns, values)) for values in zip(*(self.data[c] for c in self.columns))]
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.data, columns=self.columns)
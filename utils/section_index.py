@@ -0,0 +1,106 @@
+import re
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.clause_prescreen import normalize_tokens
+from utils.markdown_sections import MarkdownSection, iter_sections
+
+REFERENCE_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)*")
+# Words that only say "this is a reference" and never identify a heading
+REFERENCE_WORDS = frozenset({"section", "sections", "clause", "clauses", "para", "paragraph", "sub", "subsection",
+                             "annex", "annexure", "appendix", "chapter", "part", "ref", "reference", "no", "of",
+                             "the", "and", "to", "in", "for", "a", "an", "see", "page", "pages", "p", "pp", "nan"})
+
+
+class TenderSectionIndex:
+    """
+    Structural index of a tender's Markdown: section numbers and heading words
+    map to the character spans of the sections, so a clause's Clause Reference
+    can be resolved to the parts of the tender that answer it.
+    """
+
+    def __init__(self, markdown_text: str, max_level: int = 6) -> None:
+        self.markdown_text = markdown_text or ""
+        self.sections: List[MarkdownSection] = list(iter_sections(self.markdown_text, max_level=max_level))
+        self.section_starts = [section.start for section in self.sections]
+        self.by_number: Dict[str, List[int]] = defaultdict(list)
+        self.by_word: Dict[str, Set[int]] = defaultdict(set)
+        for idx, section in enumerate(self.sections):
+            if section.section_no:
+                self.by_number[section.section_no].append(idx)
+            for token in normalize_tokens(section.title):
+                if token not in REFERENCE_WORDS and not token.isdigit():
+                    self.by_word[token].add(idx)
+
+    def sections_for_number(self, number: str) -> List[MarkdownSection]:
+        return [self.sections[idx] for idx in self.by_number.get(number, ())]
+
+    def _number_matches(self, number: str) -> Set[int]:
+        """
+        Sections numbered number or below it (4.2 -> 4.2, 4.2.1, ...), else the
+        nearest numbered parent that is not a top-level number. SOTR numbering is not
+        the bidder's, so falling back to "4" would match almost any reference.
+        """
+        while number:
+            matches = set(self.by_number.get(number, ()))
+            prefix = number + "."
+            for section_no, indexes in self.by_number.items():
+                if section_no.startswith(prefix):
+                    matches.update(indexes)
+            if matches:
+                return matches
+            number = number.rpartition(".")[0]
+            if "." not in number:
+                break
+        return set()
+
+    def _heading_matches(self, words: List[str]) -> Set[int]:
+        """Sections whose heading contains every word of the reference."""
+        matches = None
+        for word in words:
+            matches = self.by_word.get(word, set()) if matches is None else matches & self.by_word.get(word, set())
+            if not matches:
+                return set()
+        return matches or set()
+
+    def match_reference(self, reference) -> List[Tuple[int, int]]:
+        """(start, end) spans of the sections a Clause Reference points to; [] when nothing matches."""
+        reference = "" if reference is None else str(reference)
+        matches = set()
+        for number in REFERENCE_NUMBER_PATTERN.findall(reference):
+            matches |= self._number_matches(number)
+        if not matches:
+            words = [token for token in normalize_tokens(reference)
+                     if token not in REFERENCE_WORDS and not token.isdigit()]
+            if words:
+                matches = self._heading_matches(words)
+        return [(self.sections[idx].start, self.sections[idx].end) for idx in sorted(matches)]
+
+    def enclosing_span(self, start: int, end: int) -> Tuple[int, int]:
+        """The span widened to the sections it starts and ends in."""
+        first = bisect_right(self.section_starts, start) - 1
+        last = bisect_right(self.section_starts, max(start, end - 1)) - 1
+        if first < 0 or last < 0:
+            return start, end
+        return self.sections[first].start, self.sections[last].end
+
+    def excerpt(self, spans: List[Tuple[int, int]]) -> str:
+        """The spans merged in document order, each kept with its header lines, separated by [...] markers."""
+        merged = []
+        for start, end in sorted(spans):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return "\n\n[...]\n\n".join(self.markdown_text[start:end].strip() for start, end in merged)
+
+    def context_for(self, references) -> Optional[str]:
+        """Excerpt covering every reference, or None if any of them has no matching section."""
+        spans = []
+        for reference in references:
+            matched = self.match_reference(reference)
+            if not matched:
+                return None
+            spans.extend(matched)
+        return self.excerpt(spans) if spans else None
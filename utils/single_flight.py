@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import Callable, Dict, Hashable, Tuple, Type
+
+from utils.cancellation import JobCancelled, check_cancelled
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    still running block until it finishes and get the same result (or the same
+    exception). Nothing is cached afterwards, the DocumentStore does that.
+
+    Errors listed in retry_errors belong to the leader rather than the work (e.g.
+    its job was cancelled): waiters then start the run again instead of failing.
+    """
+
+    def __init__(self, name: str, retry_errors: Tuple[Type[BaseException], ...] = ()) -> None:
+        self.name = name
+        self.retry_errors = retry_errors
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.stats = {"runs": 0, "shared": 0, "wait_seconds": 0.0, "max_waiters": 0}
+
+    def do(self, key: Hashable, fn: Callable, cancel_token=None):
+        """Run fn under key, or wait for the run in flight. A waiter's own cancel_token stops only its wait."""
+        while True:
+            flight, leader = self._join(key)
+            if leader:
+                return self._lead(key, flight, fn)
+
+            print(f"{self.name}: waiting on in-flight run for {key}")
+            started = time.perf_counter()
+            try:
+                while not flight.done.wait(0.5):
+                    check_cancelled(cancel_token, f"waiting for {self.name} {key}")
+            finally:
+                with self._lock:
+                    self.stats["wait_seconds"] += time.perf_counter() - started
+            if flight.error is None:
+                return flight.result
+            if not isinstance(flight.error, self.retry_errors):
+                raise flight.error
+            print(f"{self.name}: in-flight run for {key} was abandoned ({flight.error}), retrying")
+
+    def _join(self, key: Hashable):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.stats["runs"] += 1
+            else:
+                flight.waiters += 1
+                self.stats["shared"] += 1
+                self.stats["max_waiters"] = max(self.stats["max_waiters"], flight.waiters)
+        return flight, leader
+
+    def _lead(self, key: Hashable, flight: _Flight, fn: Callable):
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._flights
+
+    def metrics(self) -> Dict:
+        """Run/shared counts plus contention: the share of requests that joined an in-flight run."""
+        with self._lock:
+            requests = self.stats["runs"] + self.stats["shared"]
+            return {**self.stats, "in_flight": len(self._flights),
+                    "contention": self.stats["shared"] / requests if requests else 0.0}
+
+
+# Process-wide registry for PDF conversions, shared by every Streamlit session.
+# A conversion cancelled by its leader's session is picked up by the next waiter.
+conversion_flights = SingleFlight("conversion", retry_errors=(JobCancelled,))
@@ -1,7 +1,21 @@
 from utils.markdown_utils import PDFMarkdown
 from utils.llm_client import LLMClient
+from utils.marker_models import PAGE_WINDOW, get_marker_models, iter_pdf_windows, as_pdf_source
+from utils.cpu_inference import default_batch_multiplier
 import pandas as pd
+import os
+from concurrent.futures import ThreadPoolExecutor
 from utils.system_prompt import system_prompt as system_prompt_text
+from utils.markdown_tables import split_tables, table_to_points, has_free_text
+from utils.result_buffer import ColumnarBuffer
+from utils.document_store import result_version
+from utils.cancellation import JobCancelled, check_cancelled
+from utils.profiling import in_run_context, profile_stage
+
+MATRIX_HEADER = 'Sr. No.,Requirement(clause content),Source Reference(reference number of clause in the document)'
+MATRIX_COLUMNS = ["Sr. No.", "Clause", "Clause Reference"]
+# Pages per converted window when streaming and MARKER_PAGE_WINDOW is 0 (whole document)
+STREAM_PAGE_WINDOW = 4
 
 
 class SOTRMarkdown(PDFMarkdown):
@@ -11,6 +25,16 @@ class SOTRMarkdown(PDFMarkdown):
         self.sotr_matrix = []
         self.llm_client = llm_client
         self.df = None
+        self.out_meta = None
+        self.parse_tables = os.getenv("SOTR_TABLE_PARSER", "1") != "0"
+        self.cancel_token = None
+        # Sections whose LLM extraction failed in the last run; their rows are missing from the matrix
+        self.failed_sections = []
+
+    def result_version(self):
+        """Version a stored matrix is keyed on: it is only reused for the same prompt, models and settings."""
+        return result_version(system_prompt_text, self.llm_client.default_model, self.llm_client.fast_model,
+                              self.parse_tables)
 
     def load_from_md(self, file_content, file_id):
         self.file_id = file_id
@@ -18,58 +42,207 @@ class SOTRMarkdown(PDFMarkdown):
         return self.markdown_text
 
     def load_from_pdf(self, file_content, file_id):
-        self.file_id = file_id    
+        self.file_id = file_id
         self.pdf_path = None
-        self.markdown_text = self.pdf_to_markdown(file_content)
+        self.markdown_text = self.pdf_to_markdown(file_content, cancel_token=self.cancel_token)
         return self.markdown_text
 
     def post_process_response(self, split_text):
-        headers = ["Sr. No.", "Clause", "Clause Reference"]
-        cleaned_csv_data = []
-        for i, row in enumerate(split_text[1:]):
+        return pd.DataFrame(columns=MATRIX_COLUMNS, data=self.parse_points(split_text[1:]))
+
+    @staticmethod
+    def parse_points(lines, first_index=0):
+        """Typed [Sr. No., Clause, Clause Reference] rows; numbering counts every line, as before."""
+        rows = []
+        for i, row in enumerate(lines, start=first_index):
             items = row.split("|")
             if len(items)==3:
-                cleaned_csv_data.append([i, items[1].replace('"', ''), items[2]])
-            else:
-                continue
-        df = pd.DataFrame(columns=headers, data=cleaned_csv_data)
-        return df
-
-    def get_matrix_points(self):
-        points = ['Sr. No.,Requirement(clause content),Source Reference(reference number of clause in the document)']
-        if self.markdown_text:
-            markdown_text_splits = self.split_markdown_by_headers()
-            print(markdown_text_splits)
-            cleaned_text_splits = []
-            for point in markdown_text_splits:
-                section_header = point.metadata["Header 2"]
-                section_no = section_header.split(" ")[0]
-                if point.page_content.strip():
-                    cleaned_text_splits.append({"section": section_no, "content": point.page_content})
-            
-            self.markdown_sections = cleaned_text_splits
-            print(cleaned_text_splits)
-
-            for i, text_block in enumerate(cleaned_text_splits):
-                user_prompt = f"""
+                rows.append([i, items[1].replace('"', ''), items[2]])
+        return rows
+
+    def split_sections(self, markdown_text=None, open_headers=()):
+        markdown_text = markdown_text if markdown_text is not None else self.markdown_text
+        cleaned_text_splits = []
+        for section in self.iter_sections(markdown_text, open_headers=open_headers):
+            content = section.text(markdown_text).strip()
+            if content:
+                cleaned_text_splits.append({"section": section.section_no, "content": content,
+                                            "start": section.start, "end": section.end,
+                                            "pages": (section.page_start, section.page_end)})
+        return cleaned_text_splits
+
+    def extract_section_points(self, text_block):
+        """
+        Return one section's matrix rows (without the header line), in document order.
+        Markdown tables are turned into rows locally; each stretch of text between
+        them goes to the LLM, however short.
+        """
+        if not self.parse_tables:
+            return self.extract_text_points(text_block)
+
+        with profile_stage("sotr.tables"):
+            segments = split_tables(text_block["content"])
+        if not any(kind == "table" for kind, _ in segments):
+            return self.extract_text_points(text_block)
+
+        points = []
+        for kind, segment in segments:
+            if kind == "table":
+                header, rows = segment
+                with profile_stage("sotr.tables"):
+                    points.extend(table_to_points(header, rows, text_block["section"]))
+            elif has_free_text(segment):
+                points.extend(self.extract_text_points({**text_block, "content": segment}))
+        return points
+
+    def extract_text_points(self, text_block):
+        """Send one section's text to the LLM and return its matrix rows (without the header line)."""
+        user_prompt = f"""
                 section number:
                 {text_block["section"]}
                 markdown text:
                 {text_block["content"]}
                 """
-                try:
-                    response = self.llm_client.call_llm(system_prompt = system_prompt_text, user_prompt = user_prompt, max_tokens = 8192)
-                    if response is None:
-                        print(f"Warning: LLM returned None for section {text_block['section']}. Skipping this section.")
-                        continue
-                    split_points = response.split("\n")
-                    points.extend(split_points[1:])
-                    print(f"completed {i+1}/{len(cleaned_text_splits)}")
-                except Exception as e:
-                    print(f"Error processing section {text_block['section']}: {str(e)}")
-
-            self.sotr_matrix = points
-            self.df = self.post_process_response(points)
-            return self.df, points
-        else:
-            raise Exception("self.markdown_text is None. Please convert file to markdown first using pdf_to_markdown()")
\ No newline at end of file
+        try:
+            with profile_stage("sotr.llm"):
+                response, tier = self.llm_client.call_llm_tiered(system_prompt = system_prompt_text, user_prompt = user_prompt,
+                                                                 accept = self.is_valid_matrix_response, max_tokens = 8192,
+                                                                 cancel_token = self.cancel_token)
+            if response is None:
+                print(f"Warning: LLM returned None for section {text_block['section']}. Skipping this section.")
+                self.failed_sections.append(text_block["section"])
+                return []
+            return response.split("\n")[1:]
+        except JobCancelled:
+            raise
+        except Exception as e:
+            print(f"Error processing section {text_block['section']}: {str(e)}")
+            self.failed_sections.append(text_block["section"])
+            return []
+
+    @staticmethod
+    def is_valid_matrix_response(response):
+        """Every row after the header line must split into Sr. No.|Clause|Clause Reference."""
+        rows = [row for row in response.split("\n")[1:] if row.strip()]
+        return all(len(row.split("|")) == 3 for row in rows)
+
+    def iter_matrix_points(self):
+        """Extract section by section, yielding (sections_done, total_sections, section_points)."""
+        if not self.markdown_text:
+            raise Exception("self.markdown_text is None. Please convert file to markdown first using pdf_to_markdown()")
+        cleaned_text_splits = self.split_sections()
+        self.markdown_sections = cleaned_text_splits
+        print(cleaned_text_splits)
+
+        for i, text_block in enumerate(cleaned_text_splits):
+            check_cancelled(self.cancel_token, f"section {i+1}/{len(cleaned_text_splits)}")
+            yield i + 1, len(cleaned_text_splits), self.extract_section_points(text_block)
+            print(f"completed {i+1}/{len(cleaned_text_splits)}")
+
+    def get_matrix_points(self, progress_callback=None):
+        """
+        Build the matrix from iter_matrix_points into a ColumnarBuffer.
+        progress_callback receives (sections_done, total_sections, buffer) after every section.
+        """
+        points = [MATRIX_HEADER]
+        matrix_rows = ColumnarBuffer(MATRIX_COLUMNS)
+        self.failed_sections = []
+        for done, total, section_points in self.iter_matrix_points():
+            matrix_rows.append_rows(self.parse_points(section_points, len(points) - 1))
+            points.extend(section_points)
+            if progress_callback:
+                progress_callback(done, total, matrix_rows)
+
+        self.sotr_matrix = points
+        self.df = matrix_rows.to_frame()
+        print(f"LLM tiers: {self.llm_client.tier_summary()}")
+        return self.df, points
+
+    def stream_matrix_points_from_pdf(self, file_content, file_id, page_window=None, max_workers=4, progress_callback=None, rows_callback=None):
+        """
+        Convert the PDF window by window and start LLM extraction for each section as
+        soon as the next header (level <= 3, as iter_sections splits) closes it, so
+        conversion and extraction overlap. page_window defaults to MARKER_PAGE_WINDOW
+        (STREAM_PAGE_WINDOW when that is 0, since one window would leave nothing to
+        overlap). Section offsets refer to the joined markdown_text.
+        Finished sections are collected in document order while conversion goes on;
+        rows_callback receives (sections_done, sections_queued, buffer) after each.
+        Returns the same (df, points) as get_matrix_points.
+        """
+        self.file_id = file_id
+        self.pdf_path = None
+        self.failed_sections = []
+        points = [MATRIX_HEADER]
+        matrix_rows = ColumnarBuffer(MATRIX_COLUMNS)
+        sections = []
+        futures = []
+        # Converted text so far; everything from base on has not been split into sections yet
+        markdown_text = ""
+        base = 0
+        # Headers still open at base, so a section cut off by a window keeps its parent's number
+        open_headers = ()
+        collected = 0
+
+        def collect(block):
+            nonlocal collected
+            while collected < len(futures) and (block or futures[collected].done()):
+                section_points = futures[collected].result()
+                matrix_rows.append_rows(self.parse_points(section_points, len(points) - 1))
+                points.extend(section_points)
+                collected += 1
+                print(f"completed {collected}/{len(futures)}")
+                if rows_callback:
+                    rows_callback(collected, len(futures), matrix_rows)
+
+        def submit(chunk, offset):
+            for text_block in self.split_sections(chunk, open_headers):
+                text_block["start"] += offset
+                text_block["end"] += offset
+                sections.append(text_block)
+                futures.append(executor.submit(in_run_context(self.extract_section_points), text_block))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            windows = iter_pdf_windows(
+                self.convert_single_pdf, as_pdf_source(file_content), get_marker_models(),
+                file_id=file_id, page_window=page_window or PAGE_WINDOW or STREAM_PAGE_WINDOW,
+                batch_multiplier=default_batch_multiplier(),
+                cancel_token=self.cancel_token
+            )
+            try:
+                for full_text, doc_images, window_meta in windows:
+                    if full_text:
+                        markdown_text = f"{markdown_text}\n\n{full_text}" if markdown_text else full_text
+                    pending = markdown_text[base:]
+                    # The last section may continue in the next window, so cut before its header
+                    last = None
+                    for last in self.iter_sections(pending, open_headers=open_headers):
+                        pass
+                    if last is not None and last.start > 0:
+                        submit(pending[:last.start], base)
+                        base += last.start
+                        # The last section's header is re-read at the new base; any deeper
+                        # open headers it replaces are popped as usual
+                        open_headers = last.headers
+                    if progress_callback:
+                        progress_callback(window_meta["window"], len(futures))
+                    print(f"converted window {window_meta['window'][0]}/{window_meta['window'][1]}, {len(futures)} sections queued")
+                    collect(block=False)
+
+                if markdown_text[base:].strip():
+                    submit(markdown_text[base:], base)
+                collect(block=True)
+            except BaseException as e:
+                # Drop queued sections and cancel the token so running ones stop at their next
+                # cancellation check, before the executor waits for them on exit
+                for future in futures:
+                    future.cancel()
+                if self.cancel_token is not None:
+                    self.cancel_token.cancel(f"stopped by {type(e).__name__}")
+                raise
+
+        self.markdown_text = markdown_text
+        self.markdown_sections = sections
+        self.sotr_matrix = points
+        self.df = matrix_rows.to_frame()
+        print(f"LLM tiers: {self.llm_client.tier_summary()}")
+        return self.df, points
@@ -0,0 +1,98 @@
+import os
+import random
+import re
+import threading
+import time
+
+from utils.cancellation import check_cancelled
+from utils.llm_client import LLMClient
+
+# Mean latency of one stubbed call, spread uniformly by +/- LLM_STUB_JITTER of itself
+LLM_STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", "800"))
+LLM_STUB_JITTER = float(os.getenv("LLM_STUB_JITTER", "0.25"))
+# Extra latency per 1000 prompt characters, so long tender prompts are slower like the real API
+LLM_STUB_MS_PER_1K_CHARS = float(os.getenv("LLM_STUB_MS_PER_1K_CHARS", "2"))
+# Share of calls that fail (call_llm then returns None, as on an API error)
+LLM_STUB_ERROR_RATE = float(os.getenv("LLM_STUB_ERROR_RATE", "0"))
+LLM_STUB_MAX_ROWS = 20
+
+CLAUSE_LINE_PATTERN = re.compile(r"^(\S+?), (.+)$")
+QUESTION_LINE_PATTERN = re.compile(r"^Question (\d+): (.+)$", re.MULTILINE)
+
+
+class StubLLMClient(LLMClient):
+    """
+    Local stand-in for LLMClient used by load tests (LLM_BACKEND=stub).
+
+    Calls sleep for a configurable latency, fail at a configurable rate and answer
+    with canned text in the format each prompt asks for (SOTR matrix rows, compliance
+    lines, Q&A answers), so the whole pipeline runs without the Anthropic API.
+    Rate limiting, tiering and cancellation behave as in the real client.
+    """
+
+    def __init__(self, anthropic_model=None, rate_limiter=None, fast_model=None, latency_ms=None, error_rate=None,
+                 seed=None):
+        super().__init__(anthropic_model=anthropic_model, rate_limiter=rate_limiter, fast_model=fast_model)
+        self.default_model = self.default_model or "stub"
+        # Never used: _create below answers every call locally
+        self.client = None
+        self.latency_ms = LLM_STUB_LATENCY_MS if latency_ms is None else latency_ms
+        self.error_rate = LLM_STUB_ERROR_RATE if error_rate is None else error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def _create(self, system_prompt, user_prompt, model, max_tokens, history, cancel_token=None):
+        with self._random_lock:
+            jitter = self._random.uniform(-LLM_STUB_JITTER, LLM_STUB_JITTER)
+            failed = self._random.random() < self.error_rate
+        delay = (self.latency_ms * (1 + jitter) + LLM_STUB_MS_PER_1K_CHARS * len(user_prompt) / 1000) / 1000
+        if cancel_token is not None:
+            cancel_token.wait(delay)
+            check_cancelled(cancel_token, "during LLM call")
+        else:
+            time.sleep(delay)
+        if failed:
+            raise Exception("Stubbed LLM error")
+        return self.respond(system_prompt, user_prompt)
+
+    def respond(self, system_prompt, user_prompt):
+        """Canned answer in the format the system prompt asks for."""
+        from utils.system_prompt import system_prompt as sotr_system_prompt
+        from utils.system_prompt import compliance_check_system_prompt, compliance_check_compact_system_prompt
+        from utils.tender_qa import qa_digest_system_prompt
+
+        if system_prompt == sotr_system_prompt:
+            return self.matrix_response(user_prompt)
+        if system_prompt == compliance_check_compact_system_prompt:
+            return "\n".join(f"{index}|{self.status(clause)}|Stubbed assessment.|-"
+                             for index, clause in self.clauses(user_prompt))
+        if system_prompt == compliance_check_system_prompt:
+            status_names = {"Y": "Yes", "P": "Partial", "N": "No"}
+            lines = ["Clause Number|Clause Text|Compliance Summary|Status|Reference"]
+            lines += [f"{index}|{clause.replace('|', '/')}|Stubbed assessment.|{status_names[self.status(clause)]}|Not found"
+                      for index, clause in self.clauses(user_prompt)]
+            return "\n".join(lines)
+        if system_prompt == qa_digest_system_prompt:
+            return "\n".join(f"Question {number}: Stubbed answer to \"{question}\"."
+                             for number, question in QUESTION_LINE_PATTERN.findall(user_prompt.split("Questions:")[-1]))
+        question = user_prompt.rpartition("Question:")[2].strip() or "the question"
+        return f"Stubbed answer to \"{question}\"."
+
+    @staticmethod
+    def matrix_response(user_prompt):
+        section, _, text = user_prompt.partition("markdown text:")
+        section = section.replace("section number:", "").strip() or "-"
+        lines = [line.strip().lstrip("#-* ").replace("|", "/") for line in text.split("\n")]
+        rows = [line for line in lines if len(line) > 3][:LLM_STUB_MAX_ROWS]
+        header = "Sr. No.|Requirement (clause content)|Source Reference (reference number of clause in the document)"
+        return "\n".join([header] + [f"{i}|{row}|{section}" for i, row in enumerate(rows, start=1)])
+
+    @staticmethod
+    def clauses(user_prompt):
+        block = user_prompt.rpartition("Clauses:\n")[2]
+        return [match.groups() for match in map(CLAUSE_LINE_PATTERN.match, block.split("\n")) if match]
+
+    @staticmethod
+    def status(clause):
+        """Deterministic per clause, so repeated runs give the same results."""
+        return "YPN"[sum(map(ord, clause)) % 3]
@@ -92,4 +92,19 @@ system_prompt="""
             Return only the compliance matrix in CSV format with pipe (|) as the separator and no other text along with it. The CSV should have the following header:
 
             Sr. No.|Requirement (clause content)|Source Reference (reference number of clause in the document)
-"""
\ No newline at end of file
+"""
+compliance_check_compact_system_prompt = """
+                You are a compliance analyst comparing compliance clauses against a tender document. For each clause, decide whether the tender meets it.
+
+                Respond with one line per clause and nothing else, using | as the separator:
+                ID|S|Summary|Ref
+                ID: the clause number exactly as given before the clause text.
+                S: Y if fully compliant, P if partially compliant, N if not compliant.
+                Summary: at most 20 words on why. Do not repeat the clause text.
+                Ref: the number of the tender section that supports your answer (e.g. 4.2), or - if the tender does not address the clause.
+                Do not quote the clause or the tender, do not add a header line or any other text.
+                Example output:
+                1|N|Support only 9-5 on weekdays, not 24/7.|3.1
+                2|P|Delivery in 3-7 days may exceed the 5-day limit.|5
+                3|N|Not addressed.|-
+            """
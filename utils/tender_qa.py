@@ -0,0 +1,217 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+from utils.markdown_sections import iter_sections
+from utils.models import QuestionInputFormat
+from utils.response_processing import process_response
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+SECTION_NO_PATTERN = re.compile(r"^(\d+(?:\.\d+)*)\.?\s")
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i in is it its of on or
+shall should that the their there this to was what when where which who will with
+""".split())
+
+qa_system_prompt = """
+You are a helpful assistant answering questions about a tender document.
+You are given only the passages of the tender that are most relevant to the question, each labelled with its source section.
+Answer using only these passages. After every fact, cite the section it came from in square brackets, e.g. [Section 4.2 Bid Validity].
+If the passages do not contain the answer, say so plainly instead of guessing.
+"""
+
+qa_digest_system_prompt = """
+You are a helpful assistant answering a fixed list of questions about a tender document.
+You are given only the passages of the tender that are most relevant to the questions, each labelled with its source section.
+Answer every question using only these passages, citing the section after every fact in square brackets, e.g. [Section 4.2 Bid Validity].
+Keep each answer to a few sentences. If the passages do not contain the answer, say "Not stated in the tender."
+Start each answer on a new line as "Question <number>: <answer>", in the order the questions are given, with no other text.
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class TenderQA:
+    """
+    Retrieval-augmented Q&A over a single tender.
+
+    The Markdown is split into passages and indexed with BM25 once, so each
+    question only sends the top matching passages and a compacted history.
+    """
+
+    def __init__(self, llm_client, markdown_text: str, top_k: int = 6, max_passage_chars: int = 1500,
+                 history_turns: int = 3, max_history_chars: int = 600, k1: float = 1.5, b: float = 0.75):
+        self.llm_client = llm_client
+        self.markdown_text = markdown_text or ""
+        self.top_k = top_k
+        self.max_passage_chars = max_passage_chars
+        self.history_turns = history_turns
+        self.max_history_chars = max_history_chars
+        self.k1 = k1
+        self.b = b
+        self.passages = self.split_passages()
+        self._build_index()
+
+    def split_passages(self) -> List[Dict]:
+        """Split the Markdown into header-labelled passages of at most max_passage_chars."""
+        passages = []
+        for section in iter_sections(self.markdown_text, max_level=6):
+            content = self.markdown_text[section.start:section.end].strip()
+            if not content:
+                continue
+            heading = section.title.strip("*").strip() or "Preamble"
+            number = SECTION_NO_PATTERN.match(heading + " ")
+            passages.extend(self._chunk(content, heading, number.group(1) if number else "", section.start, section.end))
+        return passages
+
+    def _chunk(self, content: str, heading: str, section: str, start: int, end: int) -> List[Dict]:
+        if len(content) <= self.max_passage_chars:
+            return [{"heading": heading, "section": section, "content": content, "start": start, "end": end}]
+
+        chunks = []
+        current = ""
+        for paragraph in content.split("\n\n"):
+            if current and len(current) + len(paragraph) + 2 > self.max_passage_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+            while len(current) > self.max_passage_chars:
+                chunks.append(current[:self.max_passage_chars])
+                current = current[self.max_passage_chars:]
+        if current.strip():
+            chunks.append(current)
+        return [{"heading": heading, "section": section, "content": chunk, "start": start, "end": end} for chunk in chunks]
+
+    def _build_index(self) -> None:
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+        for doc_id, passage in enumerate(self.passages):
+            terms = Counter(tokenize(f"{passage['heading']} {passage['content']}"))
+            self.doc_lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((doc_id, tf))
+
+        doc_count = len(self.passages)
+        self.avg_doc_length = (sum(self.doc_lengths) / doc_count) if doc_count else 0.0
+        self.idf = {
+            term: math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def retrieve(self, question: str, context: Optional[str] = None) -> List[Dict]:
+        """
+        Return the top_k passages for the question. Terms from context (usually the
+        previous question) are weighted at half so follow-ups keep their subject.
+        """
+        weights = Counter()
+        for term in tokenize(question):
+            weights[term] += 1.0
+        if context:
+            for term in tokenize(context):
+                weights[term] += 0.5
+
+        scores = defaultdict(float)
+        for term, weight in weights.items():
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_doc_length or 1))
+                scores[doc_id] += weight * idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:self.top_k]
+        return [self.passages[doc_id] for doc_id, _ in sorted(ranked)]
+
+    def compact_history(self, history: List[Dict]) -> List[Dict]:
+        """
+        Keep the last history_turns exchanges (truncated) as chat messages and fold
+        older questions into a single note, so the prompt size stays bounded.
+        """
+        turns = [m for m in history if m.get("content")]
+        while turns and turns[0]["role"] != "user":
+            turns.pop(0)
+
+        recent_start = max(0, len(turns) - self.history_turns * 2)
+        while recent_start < len(turns) and turns[recent_start]["role"] != "user":
+            recent_start += 1
+
+        earlier = [m["content"] for m in turns[:recent_start] if m["role"] == "user"]
+        messages = []
+        for message in turns[recent_start:]:
+            content = message["content"]
+            if len(content) > self.max_history_chars:
+                content = content[:self.max_history_chars] + " ..."
+            if messages and messages[-1]["role"] == message["role"]:
+                messages[-1]["content"] += "\n" + content
+            else:
+                messages.append({"role": message["role"], "content": content})
+
+        if earlier and messages:
+            note = "Earlier questions in this conversation: " + "; ".join(q[:150] for q in earlier[-5:])
+            messages[0]["content"] = f"{note}\n\n{messages[0]['content']}"
+        if messages and messages[-1]["role"] == "user":
+            messages.pop()
+        return messages
+
+    @staticmethod
+    def format_source(passage: Dict) -> str:
+        if passage["section"] and not passage["heading"].startswith(passage["section"]):
+            return f"Section {passage['section']} {passage['heading']}"
+        return f"Section {passage['heading']}"
+
+    def ask(self, question: str, history: Optional[List[Dict]] = None) -> Tuple[Optional[str], List[Dict]]:
+        """
+        Answer the question from retrieved passages. history is the chat so far,
+        excluding the current question. Returns the answer and the cited passages.
+        """
+        history = history or []
+        previous_questions = [m["content"] for m in history if m["role"] == "user"]
+        passages = self.retrieve(question, context=previous_questions[-1] if previous_questions else None)
+
+        context = "\n\n".join(f"[{self.format_source(p)}]\n{p['content']}" for p in passages)
+        user_prompt = f"Tender passages:\n\n{context or 'No relevant passages found.'}\n\nQuestion: {question}"
+
+        response = self.llm_client.call_llm(
+            system_prompt=qa_system_prompt,
+            user_prompt=user_prompt,
+            history=self.compact_history(history),
+        )
+        return response, passages
+
+    def ask_many(self, questions: List[QuestionInputFormat], passages_per_question: int = 3) -> Dict[int, Tuple[str, List[Dict]]]:
+        """
+        Answer several standalone questions in one LLM call over the union of their
+        top passages. Returns question_no -> (answer, passages retrieved for it);
+        questions the response does not answer are left out.
+        """
+        retrieved = {q.question_no: self.retrieve(q.question)[:passages_per_question] for q in questions}
+        passages = []
+        seen = set()
+        for question_passages in retrieved.values():
+            for passage in question_passages:
+                key = (passage["start"], passage["content"][:80])
+                if key not in seen:
+                    seen.add(key)
+                    passages.append(passage)
+        passages.sort(key=lambda passage: passage["start"])
+
+        context = "\n\n".join(f"[{self.format_source(p)}]\n{p['content']}" for p in passages)
+        # Numbered 1..n in prompt order, which is what process_response expects
+        numbered = "\n".join(f"Question {i}: {q.question}" for i, q in enumerate(questions, start=1))
+        user_prompt = f"Tender passages:\n\n{context or 'No relevant passages found.'}\n\nQuestions:\n{numbered}"
+
+        response = self.llm_client.call_llm(system_prompt=qa_digest_system_prompt, user_prompt=user_prompt,
+                                            max_tokens=4096)
+        if response is None:
+            return {}
+
+        answers = {}
+        for answer in process_response(response):
+            if 1 <= answer["question_no"] <= len(questions) and answer["response"]:
+                question = questions[answer["question_no"] - 1]
+                answers[question.question_no] = (answer["response"], retrieved[question.question_no])
+        return answers
+